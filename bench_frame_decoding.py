@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: websocket frames per second through the listener's decode path.
+
+Compares the old path (frame decoded to str, stdlib json.loads, then separate
+extract_location_from_event and extract_meas_id calls, each walking the event) with every
+installed decoder in FRAME_DECODERS on raw bytes and single-pass extraction, with
+and without the ID prefilter.
+
+Frames come from a file written by measure_latency.py --record-frames, or are
+synthesized as a busy site-wide stream where one frame in --match-every is for the
+target tag.
+
+Usage:
+  python3 bench_frame_decoding.py [--frames FILE --system-id ID] [-n 50000] [--match-every 50]
+"""
+
+import argparse
+import json
+import random
+import time
+
+from measure_latency import (
+    FRAME_DECODERS,
+    FramePrefilter,
+    extract_location_fields,
+    extract_location_from_event,
+    extract_meas_id,
+)
+
+
+SYSTEM_ID = "0b409f9eeb834f9e8346ee4b9abe9cbb"
+
+
+def synthesize_frames(n: int, match_every: int, seed: int = 1) -> list[tuple[str, bytes]]:
+    """(system_name, frame) pairs in the WiFi-Cloud and ILaaS formats, mostly for other tags."""
+    rng = random.Random(seed)
+    frames = []
+    for i in range(n):
+        node_id = SYSTEM_ID if i % match_every == 0 else f"{rng.getrandbits(128):032x}"
+        x, y, z = rng.uniform(0, 200), rng.uniform(0, 100), rng.uniform(0, 5)
+        meas_id = f"{rng.getrandbits(64):016x}"
+        ts = 1760000000000 + i * 20
+        if i % 2:
+            event = {"id": node_id, "update": {"events": {"tracker": {"location": {
+                "x": x, "y": y, "z": z, "meas_id": meas_id, "timestamp": ts, "published_timestamp": ts + 40,
+                "quality": {"hdop": 1.2, "anchors": [f"a{k}" for k in range(6)]},
+            }}}}}
+            frames.append(("WiFi-Cloud", json.dumps(event).encode()))
+        else:
+            event = {
+                "tagResName": f"tag-{node_id}", "measureType": "location", "x": x * 100, "y": y * 100,
+                "z": z * 100, "meas_id": meas_id, "timestamp": ts, "sns_timestamp": ts + 60,
+                "siteResName": "site-f6aa5b0283114de6a3d8933bebc6dc4a", "zones": ["z1", "z2"],
+            }
+            frames.append(("ILaaS", json.dumps(event).encode()))
+    return frames
+
+
+def load_frames(path: str) -> list[tuple[str, bytes]]:
+    """Frames recorded by measure_latency.py --record-frames ("<name>\\t<frame>" lines)."""
+    frames = []
+    with open(path, "rb") as f:
+        for line in f:
+            name, _, frame = line.rstrip(b"\n").partition(b"\t")
+            if frame:
+                frames.append((name.decode(), frame))
+    return frames
+
+
+def run_baseline(frames, targets) -> int:
+    """The listener before raw-bytes decoding: str frame, json.loads, two extraction calls."""
+    matched = 0
+    for name, frame in frames:
+        try:
+            event = json.loads(frame.decode())
+        except ValueError:
+            continue
+        loc_info = extract_location_from_event(event)
+        if loc_info is None:
+            continue
+        if (event.get("id", "") or loc_info.get("node_id", "")) in targets and extract_meas_id(event, name):
+            matched += 1
+    return matched
+
+
+def make_runner(decode, prefilters):
+    def run(frames, targets) -> int:
+        matched = 0
+        for name, frame in frames:
+            if prefilters is not None and not prefilters[name].might_match(frame):
+                continue
+            try:
+                event = decode(frame)
+            except ValueError:
+                continue
+            fields = extract_location_fields(event, name)
+            if fields is not None and fields[0] in targets and fields[1] is not None:
+                matched += 1
+        return matched
+    return run
+
+
+def measure(run, frames, targets, repeat: int) -> tuple[float, int]:
+    """Best frames/s over `repeat` passes, and the number of matching frames."""
+    best = 0.0
+    matched = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        matched = run(frames, targets)
+        best = max(best, len(frames) / (time.perf_counter() - t0))
+    return best, matched
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="bench_frame_decoding.py",
+        description="Websocket frames per second per JSON decoder, with and without the ID prefilter.",
+    )
+    parser.add_argument("--frames", help="Frames recorded with measure_latency.py --record-frames (default: synthesized)")
+    parser.add_argument("--system-id", default=SYSTEM_ID, help="Target tag the listener matches (default: the synthesized one)")
+    parser.add_argument("-n", type=int, default=50000, help="Synthesized frames (default: 50000)")
+    parser.add_argument("--match-every", type=int, default=50, help="Synthesized: one frame in N is for the target (default: 50)")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes per variant, best is reported (default: 3)")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames) if args.frames else synthesize_frames(args.n, args.match_every)
+    targets = {args.system_id}
+    names = sorted({name for name, _ in frames})
+    prefilters = {name: FramePrefilter(name, args.system_id) for name in names}
+
+    variants = [("str + json, 2 calls", run_baseline)]
+    for decoder_name, decode in FRAME_DECODERS.items():
+        variants.append((f"{decoder_name}, single pass", make_runner(decode, None)))
+        variants.append((f"{decoder_name}, prefilter + single pass", make_runner(decode, prefilters)))
+
+    print(f"{len(frames)} frames ({', '.join(names)}), target {args.system_id}:")
+    baseline = None
+    for label, run in variants:
+        rate, matched = measure(run, frames, targets, args.repeat)
+        baseline = baseline or rate
+        print(f"  {label:<34} {rate:12,.0f} frames/s  ({rate / baseline:5.1f}x, {matched} matched)")
+    if "orjson" not in FRAME_DECODERS:
+        print("  (orjson not installed: pip install orjson)")
+
+
+if __name__ == "__main__":
+    main()
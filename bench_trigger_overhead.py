@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: client-side cost of a locate trigger, from scheduler tick to the
+last request byte leaving the socket.
+
+Runs against a local aiohttp server (no credentials or network needed) over one
+kept-alive connection, and compares building the payload per call (dict body,
+JSON-encoded by aiohttp) with the pre-serialized path (Rest.prepare_post).
+
+Usage:
+  python3 bench_trigger_overhead.py [-n 2000] [--warmup 200]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from aiohttp import web
+
+from rest_client import Rest, Config, RequestTiming
+from measure_latency import build_locate_payload, locate_request
+
+
+SYSTEM_ID = "0b409f9eeb834f9e8346ee4b9abe9cbb"
+NODE_TYPE = "tracker"
+
+
+async def _action(request):
+    await request.read()
+    return web.json_response({"action_id": "bench"})
+
+
+async def start_server():
+    app = web.Application()
+    app.router.add_post("/nodes/{system_id}/action", _action)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/"
+
+
+async def run_dict(rest_client: Rest, timing: RequestTiming):
+    payload = build_locate_payload(NODE_TYPE)
+    await rest_client.post(f"nodes/{SYSTEM_ID}/action", payload, timing=timing)
+
+
+async def run_prepared(rest_client: Rest, timing: RequestTiming):
+    prepared = locate_request(rest_client, SYSTEM_ID, NODE_TYPE)
+    await rest_client.post(prepared.svc, prepared, timing=timing)
+
+
+async def measure(rest_client: Rest, send, n: int, warmup: int) -> list[float]:
+    """Tick-to-socket times in microseconds."""
+    samples = []
+    for i in range(warmup + n):
+        timing = RequestTiming()
+        tick = time.perf_counter()
+        await send(rest_client, timing)
+        if i >= warmup and timing.request_sent is not None:
+            samples.append((timing.request_sent - tick) * 1e6)
+    return samples
+
+
+def summarize(name: str, samples: list[float]) -> str:
+    ordered = sorted(samples)
+    pct = lambda p: ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+    return (
+        f"  {name:<10} n={len(ordered):<6} mean={statistics.fmean(ordered):7.1f}us  "
+        f"p50={pct(50):7.1f}us  p90={pct(90):7.1f}us  p99={pct(99):7.1f}us"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        prog="bench_trigger_overhead.py",
+        description="Client-side cost of a locate trigger, scheduler tick to request on the socket.",
+    )
+    parser.add_argument("-n", type=int, default=2000, help="Measured requests per variant (default: 2000)")
+    parser.add_argument("--warmup", type=int, default=200, help="Unmeasured requests per variant (default: 200)")
+    args = parser.parse_args()
+
+    runner, url = await start_server()
+    config = Config(url, "bench", "bench", token_file="token_bench.txt")
+    try:
+        async with Rest(config, limit_per_host=1) as rest_client:
+            # Static key: no token fetch, the Authorization header is still sent
+            rest_client.config.SERVICE_KEY = "bench"
+            results = {}
+            # Interleave the variants so drift (CPU frequency, GC) hits both equally
+            for _ in range(2):
+                for name, send in (("dict", run_dict), ("prepared", run_prepared)):
+                    results.setdefault(name, []).extend(await measure(rest_client, send, args.n // 2, args.warmup))
+            print("Scheduler tick -> last request byte written (one kept-alive connection):")
+            for name, samples in results.items():
+                print(summarize(name, samples))
+            print(f"  connections created: {rest_client.stats['connections_created']}, "
+                  f"reused: {rest_client.stats['connections_reused']}")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -30,29 +30,87 @@ Example:
 
 import argparse
 import asyncio
+import bisect
 import csv
+import functools
+import inspect
 import json
+import math
+import random
+import statistics
 import time
-from dataclasses import dataclass
-from datetime import datetime, timezone
+import types
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional, Union
 from urllib.parse import urlparse, parse_qs
 
+import aiohttp
 import socketio
 import websockets
 
-from rest_client import Rest, Config
+try:
+    import orjson
+except ImportError:  # Optional: faster decoding of websocket frames (see FRAME_DECODERS)
+    orjson = None
+
+from rest_client import Rest, Config, RequestTiming, RetryPolicy, Attempt, AdaptiveLimiter, PinnedResolver, PreparedRequest, ResumingTLSContext, SOCKET_PROFILES, ClockSync
 
 
 @dataclass
 class Trigger:
     """A single locate API trigger."""
     index: int                      # 1-indexed trigger number
-    timestamp_utc: datetime         # Wall-clock time when API call was initiated
-    perf_time: float                # time.perf_counter() at API call initiation
+    timestamp_utc: datetime         # Wall-clock time the request left the host (latency origin)
+    perf_time: float                # time.perf_counter() at the same instant
     api_response_time_ms: float     # How long the POST took
     action_id: str = ""             # From API response (diagnostics)
+    http_timing: Optional[RequestTiming] = None  # Per-phase HTTP breakdown of the POST
+    attempts: list[Attempt] = field(default_factory=list)  # Every HTTP attempt (retries, hedges)
+    error: str = ""                 # Set when every attempt failed
+    system_id: str = ""             # Node the locate was triggered on
+    socket_profile: str = ""        # REST SocketProfile the POST was sent with
+    scheduled_perf: Optional[float] = None  # perf_counter() deadline the scheduler fired it for
+    fired_perf: Optional[float] = None      # perf_counter() when the scheduler's timer released it
+    dispatched_perf: Optional[float] = None  # perf_counter() when its send task started running
+
+    @property
+    def retried(self) -> bool:
+        """True if the POST needed more than one attempt (retry or hedge)."""
+        return len(self.attempts) > 1
+
+    @property
+    def lateness_ms(self) -> Optional[float]:
+        """How long after its scheduled deadline the request actually left the host."""
+        if self.scheduled_perf is None:
+            return None
+        return (self.perf_time - self.scheduled_perf) * 1000
+
+    @property
+    def intended_perf(self) -> float:
+        """When the request should have left: its scheduled deadline, else when it did."""
+        return self.perf_time if self.scheduled_perf is None else self.scheduled_perf
+
+    @property
+    def timer_lateness_ms(self) -> Optional[float]:
+        """How long after its deadline the scheduler's timer woke up (part of lateness_ms)."""
+        if self.scheduled_perf is None or self.fired_perf is None:
+            return None
+        return (self.fired_perf - self.scheduled_perf) * 1000
+
+    @property
+    def dispatch_lag_ms(self) -> Optional[float]:
+        """How long the send task waited behind other callbacks after the timer fired (part of lateness_ms)."""
+        if self.fired_perf is None or self.dispatched_perf is None:
+            return None
+        return (self.dispatched_perf - self.fired_perf) * 1000
+
+    @property
+    def scheduled_utc(self) -> Optional[datetime]:
+        if self.scheduled_perf is None:
+            return None
+        return self.timestamp_utc - timedelta(seconds=self.perf_time - self.scheduled_perf)
 
 
 @dataclass
@@ -64,16 +122,20 @@ class CollectedEvent:
     arrival_perf_time: float        # time.perf_counter() when event arrived
     loc_info: dict
     raw_event: dict
+    node_id: str = ""               # system_id the event was matched to
 
 
 class EventCollector:
     """Thread-safe collector for location events across multiple systems."""
 
     def __init__(self):
-        self._events: dict[str, dict[str, CollectedEvent]] = {}  # meas_id -> {system_name -> event}
+        self._events: dict[tuple[str, str], dict[str, CollectedEvent]] = {}  # (node_id, meas_id) -> {system_name -> event}
         self._all_events: list[CollectedEvent] = []  # flat list for trigger assignment
         self._lock = asyncio.Lock()
+        self._arrival = asyncio.Condition(self._lock)  # notified on every new event
+        self._last_arrival: dict[tuple[str, str], float] = {}  # (system_name, node_id) -> latest arrival perf_time
         self._counts: dict[str, int] = {}  # system_name -> total events seen
+        self._frames: dict[str, dict[str, int]] = {}  # system_name -> frame counters (see count_frame)
 
     async def add_event(
         self,
@@ -83,21 +145,23 @@ class EventCollector:
         arrival_perf_time: float,
         loc_info: dict,
         raw_event: dict,
-        debug: bool = False
+        debug: bool = False,
+        node_id: str = "",
     ) -> bool:
         """
         Add an event to the collection.
 
-        Returns True if added, False if duplicate meas_id for same system.
+        Returns True if added, False if duplicate meas_id for same system and node.
         """
         async with self._lock:
             # Track total events per system
             self._counts[system_name] = self._counts.get(system_name, 0) + 1
 
-            if meas_id not in self._events:
-                self._events[meas_id] = {}
+            key = (node_id, meas_id)
+            if key not in self._events:
+                self._events[key] = {}
 
-            if system_name in self._events[meas_id]:
+            if system_name in self._events[key]:
                 if debug:
                     print(f"  [{system_name}] [skip] duplicate meas_id={meas_id}")
                 return False
@@ -109,13 +173,53 @@ class EventCollector:
                 arrival_perf_time=arrival_perf_time,
                 loc_info=loc_info,
                 raw_event=raw_event,
+                node_id=node_id,
             )
-            self._events[meas_id][system_name] = event
+            self._events[key][system_name] = event
             self._all_events.append(event)
+            self._last_arrival[(system_name, node_id)] = arrival_perf_time
+            self._arrival.notify_all()
             return True
 
-    def get_results(self) -> dict[str, dict[str, CollectedEvent]]:
-        """Return all collected events grouped by meas_id."""
+    async def wait_for_arrivals(
+        self,
+        node_ids: list[str],
+        deadlines: dict[str, float],
+        after: Union[float, dict[str, float]],
+        min_delay: Optional[dict[str, float]] = None,
+    ) -> set[str]:
+        """
+        Wait until each system in deadlines has an event for every node in node_ids that
+        arrived after `after` (or after[node_id]), or until that system's deadline passed
+        (perf_counter values). With min_delay, a system's event must arrive at least
+        min_delay[system] seconds after that, so an event too early to be the answer
+        (an ambient locate) doesn't count.
+
+        Returns the systems whose events all arrived in time.
+        """
+        after_by_node = after if isinstance(after, dict) else {n: after for n in node_ids}
+        min_delay = min_delay or {}
+        async with self._arrival:
+            while True:
+                now = time.perf_counter()
+                arrived, pending = set(), []
+                for system_name, deadline in deadlines.items():
+                    delay = min_delay.get(system_name, 0.0)
+                    if all(
+                        self._last_arrival.get((system_name, n), 0.0) > after_by_node[n] + delay for n in node_ids
+                    ):
+                        arrived.add(system_name)
+                    elif now < deadline:
+                        pending.append(deadline)
+                if not pending:
+                    return arrived
+                try:
+                    await asyncio.wait_for(self._arrival.wait(), timeout=min(pending) - now)
+                except asyncio.TimeoutError:
+                    pass
+
+    def get_results(self) -> dict[tuple[str, str], dict[str, CollectedEvent]]:
+        """Return all collected events grouped by (node_id, meas_id)."""
         return self._events
 
     def get_all_events(self) -> list[CollectedEvent]:
@@ -126,6 +230,16 @@ class EventCollector:
         """Return total event count per system."""
         return self._counts
 
+    def count_frame(self, system_name: str, parsed: bool) -> None:
+        """Count a received frame as JSON-decoded or skipped by the prefilter."""
+        counts = self._frames.setdefault(system_name, {"frames": 0, "skipped": 0, "parsed": 0})
+        counts["frames"] += 1
+        counts["parsed" if parsed else "skipped"] += 1
+
+    def get_frame_counts(self) -> dict[str, dict[str, int]]:
+        """Return {system_name: {"frames", "skipped", "parsed"}}."""
+        return self._frames
+
 
 def load_env_configs() -> dict:
     config_path = Path(__file__).with_name("env_config.json")
@@ -202,7 +316,7 @@ def build_parser() -> argparse.ArgumentParser:
         epilog=f"Environments from env_config.json: {envs}",
     )
     parser.add_argument("env", help="Environment name from env_config.json")
-    parser.add_argument("system_id", help="System ID of the node (for REST API trigger)")
+    parser.add_argument("system_id", help="System ID of the node (for REST API trigger); comma-separate several IDs to trigger them together")
     parser.add_argument("node_type", help="tag/tracker or reader/anchor")
     parser.add_argument("--ws-wifi-cloud", help="WiFi-Cloud websocket URL (baseline)")
     parser.add_argument("--ws-ilaas", help="ILaaS websocket URL")
@@ -212,19 +326,68 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--zlp-token", help="ZLP JWT token (from __session cookie)")
     parser.add_argument("--zlp-account", help="ZLP account resource name")
     parser.add_argument("--interval", type=float, default=3.0, help="Seconds between Locate API triggers (default: 3.0)")
-    parser.add_argument("--timeout", type=float, default=30.0, help="How long the test runs in seconds (default: 30.0)")
+    parser.add_argument("--arrival", choices=ARRIVAL_PROCESSES, default="fixed", help="Trigger arrival process; --interval is the mean gap (default: fixed)")
+    parser.add_argument("--jitter", type=float, default=0.25, help="jitter arrival: max deadline shift as a fraction of --interval, 0-0.5 (default: 0.25)")
+    parser.add_argument("--burst-size", type=int, default=5, help="burst arrival: triggers per burst (default: 5)")
+    parser.add_argument("--burst-spacing", type=float, default=0.0, help="burst arrival: seconds between triggers in a burst (default: 0)")
+    parser.add_argument("--ramp-end-interval", type=float, help="ramp arrivals: gap in seconds reached at the end of the run (default: --interval / 4)")
+    parser.add_argument("--ramp-steps", type=int, default=4, help="ramp-step arrival: number of constant-rate steps (default: 4)")
+    parser.add_argument("--phase-lock", action="store_true", help="Learn the tag's ambient locate cycle first and place each trigger so its event lands midway between ambient events, re-estimating drift during the run (single system ID)")
+    parser.add_argument("--phase-learn", type=float, default=60.0, help="phase lock: seconds of ambient arrivals to learn the cycle from before triggering (default: 60)")
+    parser.add_argument("--closed-loop", action="store_true", help="Fire the next locate as soon as the previous one's event arrived on every connected system (or its deadline passed), plus --settle; --interval and --arrival are ignored")
+    parser.add_argument("--arrival-deadline", type=parse_per_system, default="5", help="closed loop: seconds to wait for a system's event, with optional per-system overrides, e.g. 5,ZLP=10 (default: 5)")
+    parser.add_argument("--settle", type=float, default=1.0, help="closed loop: seconds to wait after the events before the next locate (default: 1.0)")
+    parser.add_argument("--capacity-search", choices=["step", "binary"], help="Search the locate rate (across all system IDs, rotating) at which latency breaks --slo-ms; --interval, --arrival and --timeout are ignored")
+    parser.add_argument("--rate-start", type=float, default=0.5, help="capacity search: first rate in locates/s (default: 0.5)")
+    parser.add_argument("--rate-step", type=float, help="capacity step search: rate increment in locates/s (default: --rate-start)")
+    parser.add_argument("--rate-max", type=float, default=10.0, help="capacity search: highest rate tried in locates/s (default: 10)")
+    parser.add_argument("--step-duration", type=float, default=60.0, help="capacity search: seconds each rate is held (default: 60)")
+    parser.add_argument("--step-drain", type=float, default=10.0, help="capacity search: seconds to collect late events after each step (default: 10)")
+    parser.add_argument("--search-iterations", type=int, default=4, help="capacity binary search: bisection steps (default: 4)")
+    parser.add_argument("--slo-ms", type=parse_per_system, default="3000", help="capacity search: latency SLO in ms, optionally per system, e.g. 3000,ZLP=5000 (default: 3000)")
+    parser.add_argument("--slo-percentile", type=float, default=95.0, help="capacity search: percentile the SLO applies to (default: 95)")
+    parser.add_argument("--timer-spin", type=float, default=TIMER_SPIN * 1000, help="Milliseconds before each trigger deadline the scheduler stops sleeping and spins for sub-millisecond precision; 0 uses plain asyncio.sleep (default: 2)")
+    parser.add_argument("--seed", type=int, help="Random seed for the arrival process (default: random; saved with the schedule)")
+    parser.add_argument("--repeat-count", type=int, default=0, help="Additional locates the server performs per trigger, --repeat-backoff apart; events are attributed to each expected repeat (default: 0)")
+    parser.add_argument("--repeat-backoff", type=int, default=2000, help="Milliseconds between server-side repeat locates (default: 2000)")
+    parser.add_argument("--target-ci-ms", type=float, help="Auto-stop: keep triggering until the confidence interval of --target-stat is at most this wide (ms) on every system, or for the ILaaS-ZLP delta with --target-delta; --max-duration caps the run and replaces --timeout")
+    parser.add_argument("--target-stat", choices=sorted(AUTO_STOP_STATS), default="median", help="auto-stop: statistic whose confidence interval must narrow (default: median)")
+    parser.add_argument("--confidence", type=float, default=0.95, help="auto-stop: confidence level of the interval (default: 0.95)")
+    parser.add_argument("--target-delta", action="store_true", help="auto-stop on the paired per-trigger ILaaS - ZLP latency delta instead of each system")
+    parser.add_argument("--max-duration", type=float, default=3600.0, help="auto-stop: hard cap on the trigger phase in seconds (default: 3600)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="How long triggers are sent in seconds; listening continues through the drain phase (default: 30.0)")
+    parser.add_argument("--drain-max", type=float, default=30.0, help="Longest drain phase after the last trigger in seconds; it ends earlier once every system has the last trigger's event or its p99.9-based grace expires (default: 30.0)")
+    parser.add_argument("--concurrency", type=int, default=10, help="Max locate POSTs in flight when triggering several system IDs (default: 10)")
+    parser.add_argument("--adaptive-concurrency", action="store_true", help="Adapt in-flight POSTs (up to --concurrency) to 429/5xx/latency spikes and honor Retry-After")
+    parser.add_argument("--pin-dns", action="store_true", help="Resolve each endpoint once and pin REST and websocket connections to that address")
+    parser.add_argument("--dns-ttl", type=float, default=300.0, help="Seconds a pinned DNS answer is reused before re-resolving (default: 300)")
+    parser.add_argument("--keep-warm-idle", type=float, default=4.0, help="Ping the REST connection after this many idle seconds between triggers; 0 disables (default: 4.0)")
+    parser.add_argument("--retries", type=int, default=0, help="Retry a failed locate POST up to N times with exponential backoff + jitter (default: 0)")
+    parser.add_argument("--retry-budget", type=float, default=5.0, help="Max seconds spent on one trigger's attempts and backoffs (default: 5.0)")
+    parser.add_argument("--hedge-percentile", type=float, help="Send a hedged duplicate POST when a trigger is slower than this percentile of recent POSTs (may trigger two locates)")
+    parser.add_argument("--socket-profile", choices=sorted(SOCKET_PROFILES), default="default", help="TCP socket options for REST and websocket connections (default: default)")
+    parser.add_argument("--socket-ab", type=int, default=0, metavar="N", help="A/B test: alternate the REST socket profile between low-latency and default every N trigger rounds and report the latency difference")
+    parser.add_argument("--clock-samples", type=int, default=10, help="HEAD pings sent at startup to estimate the server clock offset from Date headers; triggers keep refining it (default: 10)")
+    parser.add_argument("--json-decoder", choices=["auto", "json", "orjson"], default="auto", help="JSON decoder for websocket frames; auto uses orjson when installed, else stdlib json (default: auto)")
+    parser.add_argument("--record-frames", metavar="FILE", help="Append every raw WiFi-Cloud/ILaaS websocket frame to FILE, for bench_frame_decoding.py")
+    parser.add_argument("--exclude-retried", action="store_true", help="Leave retried/hedged/failed triggers out of the average latencies")
     parser.add_argument("--debug", action="store_true", help="Print all received messages")
     parser.add_argument("--output-format", choices=["console", "csv", "both"], default="both", help="Output format: console, csv, or both (default: both)")
     return parser
 
 
-async def trigger_locate(rest_client: Rest, system_id: str, api_node_type: str) -> dict:
-    """Trigger a single locate via REST API and return the response."""
-    payload = {
+def build_locate_payload(api_node_type: str, repeat_count: int = 0, backoff_ms: int = 2000) -> dict:
+    """
+    Body of the locate action POST.
+
+    With repeat_count > 0 the server performs that many additional locates, backoff_ms
+    apart, from the one action (see attribute_repeats for the expected schedule).
+    """
+    return {
         api_node_type: {
             "locate": {
-                "repeat_count": 0,
-                "backoff": 2000,
+                "repeat_count": repeat_count,
+                "backoff": backoff_ms,
             }
         },
         "tags": {
@@ -234,12 +397,76 @@ async def trigger_locate(rest_client: Rest, system_id: str, api_node_type: str)
             "ref_xy": "0,0,0",
         },
     }
-    api_endpoint = f"nodes/{system_id}/action"
-    print(f"  POST {api_endpoint}")
-    response = await rest_client.post(api_endpoint, payload, verbose=0)
+
+
+_locate_requests: dict[tuple, PreparedRequest] = {}
+
+
+def locate_request(
+    rest_client: Rest, system_id: str, api_node_type: str, repeat_count: int = 0, backoff_ms: int = 2000
+) -> PreparedRequest:
+    """Pre-serialized locate POST for (system_id, api_node_type, repeats), encoded once and reused."""
+    key = (rest_client.config.REST_API, system_id, api_node_type, repeat_count, backoff_ms)
+    prepared = _locate_requests.get(key)
+    if prepared is None:
+        prepared = rest_client.prepare_post(
+            f"nodes/{system_id}/action", build_locate_payload(api_node_type, repeat_count, backoff_ms)
+        )
+        _locate_requests[key] = prepared
+    return prepared
+
+
+async def trigger_locate(
+    rest_client: Rest,
+    system_id: str,
+    api_node_type: str,
+    timing: Optional[RequestTiming] = None,
+    attempts: Optional[list[Attempt]] = None,
+    echo: bool = True,
+    repeat_count: int = 0,
+    backoff_ms: int = 2000,
+) -> dict:
+    """Trigger a single locate via REST API and return the response.
+
+    If timing is given it is filled with the per-phase HTTP timestamps of the POST;
+    if attempts is given every retry/hedge attempt is appended to it. repeat_count
+    asks the server for that many more locates, backoff_ms apart, from the same action.
+    """
+    prepared = locate_request(rest_client, system_id, api_node_type, repeat_count, backoff_ms)
+    if echo:
+        print(f"  POST {prepared.svc}")
+    response = await rest_client.post(prepared.svc, prepared, verbose=0, timing=timing, attempts=attempts)
     return response
 
 
+def parse_server_timestamp(value) -> Optional[float]:
+    """
+    Epoch seconds from an event's server timestamp, or None if absent/unparseable.
+
+    Accepts epoch numbers in s, ms, us or ns (told apart by magnitude) and ISO 8601 strings.
+    """
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            try:
+                dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                return None
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            return dt.timestamp()
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        return None
+    if value > 1e17:
+        return value / 1e9
+    if value > 1e14:
+        return value / 1e6
+    if value > 1e11:
+        return value / 1e3
+    return float(value)
+
+
 def format_timestamp(epoch_ms: int) -> str:
     """Format epoch milliseconds to ISO timestamp."""
     dt = datetime.fromtimestamp(epoch_ms / 1000, tz=timezone.utc)
@@ -282,18 +509,22 @@ async def subscribe_ilaas(websocket, account_res_name: str, site_res_name: str,
         return False
 
 
-def extract_location_from_event(event: dict) -> Optional[dict]:
+def extract_location_fields(event: dict, system_name: str) -> Optional[tuple[str, Optional[str], dict]]:
     """
-    Extract location information from websocket event. Returns None if no location data.
+    (node_id, meas_id, loc_info) of a WiFi-Cloud or ILaaS location event in one walk, or
+    None for other events.
 
     Supports two formats:
-    - WiFi-Cloud: {"id": "...", "update": {"events": {"tracker": {"location": {"x": ..., "y": ..., "z": ...}}}}}
-    - ILaaS: {"tagResName": "tag-...", "measureType": "location", "x": ..., "y": ..., "z": ...}
+    - WiFi-Cloud: {"id": "...", "update": {"events": {"tracker": {"location": {"x": ..., "y": ..., "z": ..., "meas_id": ...}}}}}
+    - ILaaS: {"tagResName": "tag-...", "measureType": "location", "x": ..., "y": ..., "z": ..., "meas_id": ...}
+
+    Walks the nested dicts once for all fields; node_id is the event "id", else
+    loc_info["node_id"]. ILaaS coordinates are in centimeters and converted to meters.
     """
-    # Try WiFi-Cloud format first
-    loc = event.get("update", {}).get("events", {}).get("tracker", {}).get("location", {})
+    update = event.get("update")
+    loc = update.get("events", {}).get("tracker", {}).get("location") if isinstance(update, dict) else None
     if loc and "x" in loc:
-        return {
+        loc_info = {
             "x": loc.get("x", 0),
             "y": loc.get("y", 0),
             "z": loc.get("z", 0),
@@ -301,24 +532,35 @@ def extract_location_from_event(event: dict) -> Optional[dict]:
             "published_timestamp": loc.get("published_timestamp", 0),
             "node_id": event.get("id", "unknown"),
         }
-
-    # Try ILaaS format
-    if event.get("measureType") == "location" and "x" in event:
-        # ILaaS uses tagResName like "tag-d1638e05..." - extract the system_id part
+    elif event.get("measureType") == "location" and "x" in event:
         tag_res_name = event.get("tagResName", "")
-        node_id = tag_res_name.replace("tag-", "") if tag_res_name.startswith("tag-") else tag_res_name
-
-        # ILaaS coordinates appear to be in centimeters, convert to meters for display
-        return {
+        loc_info = {
             "x": event.get("x", 0) / 100.0,
             "y": event.get("y", 0) / 100.0,
             "z": event.get("z", 0) / 100.0,
             "timestamp": event.get("timestamp", 0),
             "published_timestamp": event.get("sns_timestamp", 0),
-            "node_id": node_id,
+            "node_id": tag_res_name[4:] if tag_res_name.startswith("tag-") else tag_res_name,
         }
+    else:
+        return None
 
-    return None
+    meas_id = None
+    if system_name == "WiFi-Cloud":
+        meas_id = (loc or {}).get("meas_id")
+    elif system_name == "ILaaS":
+        meas_id = event.get("meas_id")
+        if meas_id:
+            meas_id = str(meas_id)
+        else:
+            meas_id = (event.get("location") or {}).get("meas_id")
+    return event.get("id", "") or loc_info["node_id"], meas_id, loc_info
+
+
+def extract_location_from_event(event: dict) -> Optional[dict]:
+    """Location information of a WiFi-Cloud or ILaaS event, or None (see extract_location_fields)."""
+    fields = extract_location_fields(event, "")
+    return None if fields is None else fields[2]
 
 
 def extract_meas_id(event: dict, system_name: str, zlp_data: Optional[dict] = None) -> Optional[str]:
@@ -326,59 +568,98 @@ def extract_meas_id(event: dict, system_name: str, zlp_data: Optional[dict] = No
     Extract meas_id from an event based on system type.
 
     Args:
-        event: The raw event dict (for WiFi-Cloud and ILaaS)
+        event: The raw event dict (for WiFi-Cloud and ILaaS, see extract_location_fields)
         system_name: "WiFi-Cloud", "ILaaS", or "ZLP"
         zlp_data: The Socket.IO payload (only for ZLP)
 
     Returns:
         meas_id string or None if not found
     """
-    if system_name == "WiFi-Cloud":
-        # Path: event.update.events.tracker.location.meas_id
-        loc = event.get("update", {}).get("events", {}).get("tracker", {}).get("location", {})
-        return loc.get("meas_id")
+    if system_name == "ZLP":
+        # Socket.IO payload: data.location.meas_id
+        meas_id = ((zlp_data or {}).get("location") or {}).get("meas_id")
+        return str(meas_id) if meas_id else None
+    fields = extract_location_fields(event, system_name)
+    return None if fields is None else fields[1]
 
-    elif system_name == "ILaaS":
-        # Try root level first, then location sub-object
-        meas_id = event.get("meas_id")
-        if meas_id:
-            return str(meas_id)
-        loc = event.get("location", {})
-        if loc:
-            return loc.get("meas_id")
-        return None
 
-    elif system_name == "ZLP":
-        # Socket.IO payload: data.location.meas_id
-        if zlp_data:
-            loc = zlp_data.get("location", {})
-            meas_id = loc.get("meas_id")
-            if meas_id:
-                return str(meas_id)
-        return None
+def _json_loads(frame):
+    """stdlib json.loads; bytes are decoded as UTF-8 up front (cheaper than its encoding sniffing)."""
+    return json.loads(frame.decode() if isinstance(frame, (bytes, bytearray)) else frame)
 
-    return None
+
+# JSON decoders for websocket frames; each takes str or bytes
+FRAME_DECODERS: dict[str, Callable] = {"json": _json_loads}
+if orjson is not None:
+    FRAME_DECODERS["orjson"] = orjson.loads
+
+
+def get_frame_decoder(name: str = "auto") -> Callable:
+    """Frame decoder by name; "auto" is the fastest installed (orjson, else stdlib json)."""
+    if name == "auto":
+        return FRAME_DECODERS.get("orjson", _json_loads)
+    return FRAME_DECODERS[name]
+
+
+class FramePrefilter:
+    """
+    Substring test on a raw frame for the target IDs, run before any JSON decoding.
+
+    On a site-wide stream almost every frame is for another node, so frames that
+    can't mention a target are dropped without parsing them. IDs are searched in the
+    form the system uses: the plain hex system_id for WiFi-Cloud ("id") and ILaaS
+    (also matches its "tag-<system_id>" resource names), the UUID form for ZLP.
+    Works on str and bytes frames.
+    """
+
+    def __init__(self, system_name: str, system_id):
+        system_ids = [system_id] if isinstance(system_id, str) else list(system_id)
+        if system_name == "ZLP":
+            system_ids = [system_id_to_uuid(s) for s in system_ids]
+        self.needles = tuple(system_ids)
+        self._byte_needles = tuple(s.encode() for s in system_ids)
+
+    def might_match(self, frame) -> bool:
+        needles = self._byte_needles if isinstance(frame, (bytes, bytearray)) else self.needles
+        return any(needle in frame for needle in needles)
 
 
 async def listen_for_location(
     name: str,
     websocket,
-    system_id: str,
+    system_id,
     t_trigger: float,
     timeout: float,
     debug: bool,
-    collector: Optional[EventCollector] = None
+    collector: Optional[EventCollector] = None,
+    decoder: Optional[Callable] = None,
+    record=None,
 ) -> dict:
     """
-    Listen on an already-connected websocket for location events matching system_id.
+    Listen on an already-connected websocket for location events matching system_id
+    (a single ID or a collection of IDs).
 
     If collector is provided, collects ALL matching events until timeout.
     Otherwise, returns on first match (legacy behavior).
 
+    Frames not mentioning a target ID are skipped before JSON decoding (FramePrefilter),
+    except with debug, which shows every frame; the collector counts both kinds.
+    Frames are received as raw bytes where the websockets version allows it and decoded
+    with `decoder` (default: stdlib json, see get_frame_decoder). With a binary
+    file `record`, every frame is appended to it as "<name>\t<frame>" lines for
+    bench_frame_decoding.py.
+
     Returns: {"name": str, "count": int} when collecting
          or: {"name": str, "latency_ms": float, "loc_info": dict} (legacy single-event)
          or: {"name": str, "error": str} on failure
     """
+    targets = {system_id} if isinstance(system_id, str) else set(system_id)
+    prefilter = None if debug else FramePrefilter(name, targets)
+    decode = decoder or _json_loads
+    # Raw frames skip websockets' UTF-8 decode to str; older versions only return str
+    recv = websocket.recv
+    if "decode" in inspect.signature(websocket.recv).parameters:
+        recv = functools.partial(websocket.recv, decode=False)
     event_count = 0
     deadline = time.perf_counter() + timeout
     first_event_logged = False
@@ -390,16 +671,27 @@ async def listen_for_location(
                 break
 
             try:
-                raw_message = await asyncio.wait_for(websocket.recv(), timeout=remaining)
+                raw_message = await asyncio.wait_for(recv(), timeout=remaining)
             except asyncio.TimeoutError:
                 break
-
+            # Arrival time first, so recording and filtering don't count as latency
             t_event = time.perf_counter()
             t_event_utc = datetime.now(timezone.utc)
 
+            if record is not None:
+                frame = raw_message.encode() if isinstance(raw_message, str) else raw_message
+                record.write(name.encode() + b"\t" + frame.replace(b"\n", b" ") + b"\n")
+
+            if prefilter is not None and not prefilter.might_match(raw_message):
+                if collector is not None:
+                    collector.count_frame(name, parsed=False)
+                continue
+            if collector is not None:
+                collector.count_frame(name, parsed=True)
+
             try:
-                event = json.loads(raw_message)
-            except json.JSONDecodeError:
+                event = decode(raw_message)
+            except ValueError:  # json.JSONDecodeError and orjson.JSONDecodeError
                 if debug:
                     print(f"  [{name}] [non-JSON] {raw_message[:100]}")
                 continue
@@ -409,31 +701,28 @@ async def listen_for_location(
                 print(f"  [{name}] [first-event-structure] {json.dumps(event, indent=2)[:500]}")
                 first_event_logged = True
 
-            event_node_id = event.get("id", "")
-            loc_info = extract_location_from_event(event)
+            fields = extract_location_fields(event, name)
 
             # Skip non-location events
-            if loc_info is None:
+            if fields is None:
                 if debug:
                     event_type = list(event.get("update", {}).get("events", {}).keys())
                     if not event_type:
                         print(f"  [{name}] [skip] keys={list(event.keys())[:5]} (unknown format)")
                     else:
-                        print(f"  [{name}] [skip] node={event_node_id} type={event_type} (not a location event)")
+                        print(f"  [{name}] [skip] node={event.get('id', '')} type={event_type} (not a location event)")
                 continue
 
             # Match by system_id
-            match_id = event_node_id or loc_info.get("node_id", "")
+            match_id, meas_id, loc_info = fields
             if debug:
-                meas_id = extract_meas_id(event, name)
                 print(f"  [{name}] [event] node={match_id} meas_id={meas_id} loc=({loc_info['x']:.1f}, {loc_info['y']:.1f})")
 
-            if match_id != system_id:
+            if match_id not in targets:
                 continue
 
             # Collection mode: add to collector and continue
             if collector is not None:
-                meas_id = extract_meas_id(event, name)
                 if meas_id is None:
                     if debug:
                         print(f"  [{name}] [skip] no meas_id in event")
@@ -447,6 +736,7 @@ async def listen_for_location(
                     loc_info=loc_info,
                     raw_event=event,
                     debug=debug,
+                    node_id=match_id,
                 )
                 event_count += 1
                 continue
@@ -470,13 +760,84 @@ async def listen_for_location(
         return {"name": name, "error": str(e)}
 
 
-async def connect_zlp(url: str, token: str, debug: bool) -> Optional[socketio.AsyncClient]:
+def websocket_peer_ip(ws) -> Optional[str]:
+    """Server address a connected websocket (websockets or aiohttp) is talking to."""
+    try:
+        if hasattr(ws, "remote_address"):
+            peer = ws.remote_address
+        else:
+            peer = ws.get_extra_info("peername")
+    except Exception:
+        return None
+    return peer[0] if peer else None
+
+
+def websocket_tls_info(ws) -> Optional[str]:
+    """TLS handshake of a connected websocket, e.g. 'resumed 12.3ms' (ResumingTLSContext only)."""
+    try:
+        if hasattr(ws, "transport"):
+            sslobj = ws.transport.get_extra_info("ssl_object")
+        else:
+            sslobj = ws.get_extra_info("ssl_object")
+    except Exception:
+        return None
+    if getattr(sslobj, "handshake_ms", None) is None:
+        return None
+    return f"{'resumed' if sslobj.resumed else 'full'} {sslobj.handshake_ms:.1f}ms"
+
+
+def apply_websocket_socket_profile(ws, profile) -> None:
+    """Set a SocketProfile's TCP options on a connected websocket (websockets or aiohttp)."""
+    try:
+        if hasattr(ws, "transport"):
+            sock = ws.transport.get_extra_info("socket")
+        else:
+            sock = ws.get_extra_info("socket")
+        if sock is not None:
+            profile.apply(sock)
+    except (AttributeError, OSError) as e:
+        print(f"  Socket profile {profile.name} not applied: {e}")
+
+
+def tls_connect_kwargs(tls_context: Optional[ResumingTLSContext], url: str) -> dict:
+    """Extra websockets.connect() kwargs that use the shared TLS context (wss:// only)."""
+    if tls_context is None or urlparse(url).scheme != "wss":
+        return {}
+    return {"ssl": tls_context}
+
+
+async def pinned_connect_kwargs(resolver: Optional[PinnedResolver], url: str) -> dict:
+    """Extra websockets.connect() kwargs that pin the TCP connection to the resolver's address."""
+    if resolver is None:
+        return {}
+    parsed = urlparse(url)
+    port = parsed.port or (443 if parsed.scheme == "wss" else 80)
+    # The Host header and TLS server name still come from the URL
+    return {"host": await resolver.resolve_ip(parsed.hostname, port)}
+
+
+async def connect_zlp(
+    url: str,
+    token: str,
+    debug: bool,
+    http_session: Optional[aiohttp.ClientSession] = None,
+    decoder: Optional[Callable] = None,
+) -> Optional[socketio.AsyncClient]:
     """
     Connect to ZLP Socket.IO server.
 
+    http_session lets the caller supply the aiohttp session (e.g. with a pinned resolver
+    or a shared TLS context); decoder replaces json.loads for incoming packets (encoding
+    stays stdlib json).
+
     Returns: AsyncClient on success, None on failure.
     """
-    sio = socketio.AsyncClient()
+    client_kwargs = {}
+    if http_session:
+        client_kwargs["http_session"] = http_session
+    if decoder is not None and decoder is not _json_loads:
+        client_kwargs["json"] = types.SimpleNamespace(loads=decoder, dumps=json.dumps)
+    sio = socketio.AsyncClient(**client_kwargs)
     connected = asyncio.Event()
     connect_error = {"error": None}
 
@@ -523,28 +884,52 @@ async def connect_zlp(url: str, token: str, debug: bool) -> Optional[socketio.As
 
 async def listen_zlp_for_location(
     sio: socketio.AsyncClient,
-    system_id: str,
+    system_id,
     t_trigger: float,
     timeout: float,
     debug: bool,
     collector: Optional[EventCollector] = None
 ) -> dict:
     """
-    Listen on an already-connected ZLP Socket.IO client for location events.
+    Listen on an already-connected ZLP Socket.IO client for location events
+    matching system_id (a single ID or a collection of IDs).
 
     If collector is provided, collects ALL matching events until timeout.
     Otherwise, returns on first match (legacy behavior).
 
+    Location packets not mentioning a target device are dropped before Socket.IO
+    decodes their JSON (FramePrefilter on the raw Engine.IO message), except with debug
+    or when the socketio client has no _handle_eio_message to hand the rest on to (the
+    prefilter hooks a private method, so other versions simply run without it).
+
     Returns: {"name": "ZLP", "count": int} when collecting
          or: {"name": "ZLP", "latency_ms": float, "loc_info": dict} (legacy single-event)
          or: {"name": "ZLP", "error": str}
     """
-    target_device_id = system_id_to_uuid(system_id)
+    system_ids = [system_id] if isinstance(system_id, str) else list(system_id)
+    # ZLP reports devices in UUID form; map back to the plain system_id
+    target_device_ids = {system_id_to_uuid(s): s for s in system_ids}
     result = {"name": "ZLP", "error": "timeout"}
     event_received = asyncio.Event()
     event_count = [0]  # Use list for mutability in nested function
     first_event_logged = [False]
 
+    handle_eio_message = getattr(sio, "_handle_eio_message", None)
+    if not debug and handle_eio_message is not None:
+        prefilter = FramePrefilter("ZLP", system_ids)
+
+        async def on_eio_message(data):
+            # Only text EVENT packets ("2/locations,[...]") for location history are filtered
+            if isinstance(data, str) and data.startswith("2") and "GET_NEW_LOCATION_HISTORY" in data:
+                matched = prefilter.might_match(data)
+                if collector is not None:
+                    collector.count_frame("ZLP", parsed=matched)
+                if not matched:
+                    return
+            await handle_eio_message(data)
+
+        sio.eio.on("message", on_eio_message)
+
     @sio.on("GET_NEW_LOCATION_HISTORY", namespace="/locations")
     async def on_location(data):
         nonlocal result
@@ -565,7 +950,7 @@ async def listen_zlp_for_location(
             meas_id = extract_meas_id({}, "ZLP", zlp_data=data)
             print(f"  [ZLP] [event] deviceResName={device_res_name} meas_id={meas_id} loc=({x_cm/100:.1f}, {y_cm/100:.1f}, {z_cm/100:.1f})")
 
-        if device_res_name != target_device_id:
+        if device_res_name not in target_device_ids:
             return
 
         # Match found - extract location info (coordinates in cm, convert to m)
@@ -594,6 +979,7 @@ async def listen_zlp_for_location(
                 loc_info=loc_info,
                 raw_event=data,
                 debug=debug,
+                node_id=target_device_ids[device_res_name],
             )
             event_count[0] += 1
             return
@@ -621,45 +1007,1169 @@ async def listen_zlp_for_location(
     return result
 
 
-async def trigger_loop(
+def _build_trigger(
+    index: int,
+    system_id: str,
+    t0: float,
+    t0_utc: datetime,
+    api_rt_ms: float,
+    timing: RequestTiming,
+    attempts: list[Attempt],
+    response,
+    error: str,
+) -> Trigger:
+    """Build a Trigger from one POST's outcome, using the request-sent instant as latency origin."""
+    if not error and timing.status is not None and timing.status >= 400:
+        error = f"HTTP {timing.status}"
+
+    action_id = ""
+    if isinstance(response, dict):
+        action_id = response.get("action_id", "")
+
+    # Measure latency from the moment the request left the host, not from
+    # before the coroutine started (which includes auth, DNS, connect, ...)
+    t_sent = timing.request_sent if timing.request_sent is not None else t0
+    return Trigger(
+        index=index,
+        timestamp_utc=t0_utc + timedelta(seconds=t_sent - t0),
+        perf_time=t_sent,
+        api_response_time_ms=api_rt_ms,
+        action_id=action_id,
+        http_timing=timing,
+        attempts=attempts,
+        error=error,
+        system_id=system_id,
+    )
+
+
+def _print_trigger(trigger: Trigger, num_triggers: int, show_system_id: bool) -> None:
+    timing = trigger.http_timing
+    label = f"  Trigger {trigger.index}/{num_triggers}" if num_triggers else f"  Trigger {trigger.index}"
+    if show_system_id:
+        label += f" [{trigger.system_id}]"
+    if trigger.error:
+        print(f"{label} FAILED after {len(trigger.attempts)} attempt(s): {trigger.error}")
+        return
+    conn = "reused" if timing.connection_reused else "new"
+    retry_note = f", attempts={len(trigger.attempts)}" if trigger.retried else ""
+    late_note = f", late={trigger.lateness_ms:.1f}ms" if trigger.lateness_ms is not None else ""
+    print(
+        f"{label} sent (api_rt={trigger.api_response_time_ms:.0f}ms, "
+        f"ttfb={_fmt_ms(timing.ttfb_ms, 0)}ms, conn={conn}{retry_note}{late_note}, action_id={trigger.action_id})"
+    )
+
+
+async def _send_trigger(
     rest_client: Rest,
+    index: int,
     system_id: str,
     api_node_type: str,
+    echo: bool = True,
+    repeat_count: int = 0,
+    backoff_ms: int = 2000,
+) -> Trigger:
+    """Fire one locate POST and return its Trigger; client errors are recorded, not raised."""
+    timing = RequestTiming()
+    attempts: list[Attempt] = []
+    t0 = time.perf_counter()
+    t0_utc = datetime.now(timezone.utc)
+    error = ""
+    try:
+        response = await trigger_locate(
+            rest_client, system_id, api_node_type, timing=timing, attempts=attempts, echo=echo,
+            repeat_count=repeat_count, backoff_ms=backoff_ms,
+        )
+    except (aiohttp.ClientError, asyncio.TimeoutError, Rest.ClientError) as e:
+        # A failed trigger (including a failed token refresh) is recorded, not fatal for the whole run
+        response = None
+        error = f"{type(e).__name__}: {e}"
+    api_rt_ms = (time.perf_counter() - t0) * 1000
+    return _build_trigger(index, system_id, t0, t0_utc, api_rt_ms, timing, attempts, response, error)
+
+
+async def _send_trigger_round(
+    rest_client: Rest,
+    index: int,
+    system_ids: list[str],
+    api_node_type: str,
+    concurrency: int,
+    repeat_count: int = 0,
+    backoff_ms: int = 2000,
+) -> list[Trigger]:
+    """Fire one locate POST per system_id concurrently (bounded), returning Triggers as they complete."""
+    prepared = [
+        locate_request(rest_client, system_id, api_node_type, repeat_count, backoff_ms) for system_id in system_ids
+    ]
+    requests = [(p.svc, p) for p in prepared]
+    t_round = time.perf_counter()
+    t_round_utc = datetime.now(timezone.utc)
+    round_triggers = []
+    async for result in rest_client.post_many(requests, concurrency=concurrency):
+        error = f"{type(result.error).__name__}: {result.error}" if result.error else ""
+        t0_utc = t_round_utc + timedelta(seconds=result.started - t_round)
+        round_triggers.append(_build_trigger(
+            index, system_ids[result.index], result.started, t0_utc, result.elapsed_ms,
+            result.timing, result.attempts, result.response, error,
+        ))
+    return round_triggers
+
+
+class AmbientPhaseTracker:
+    """
+    Phase lock on a tag's ambient locate cycle, estimated from event arrivals on one system.
+
+    Tags in continuous mode emit ambient locates on their own period, and a trigger whose
+    event lands next to one is hard to tell apart from it. learn() estimates period and
+    phase from the arrivals seen before triggering starts; align() then moves each
+    trigger deadline to the nearest slot whose event is expected midway between two
+    ambient arrivals. Arrivals keep being classified as they come in: the first event
+    after a trigger is the triggered one (recent latencies set the lead), anything else
+    is ambient and refits period and phase over the last `window` ambient arrivals, so
+    the scheduler follows drift of the tag's cycle.
+    """
+
+    def __init__(self, collector: EventCollector, node_id: str, system_name: str, window: int = 20, lead_window: int = 10):
+        self.collector = collector
+        self.node_id = node_id
+        self.system_name = system_name
+        self.window = window
+        self.lead_window = lead_window
+        self.period: Optional[float] = None  # Seconds between ambient arrivals
+        self.phase: Optional[float] = None   # perf_counter() of a reference ambient arrival
+        self.lead = 0.0                      # Trigger -> triggered event on system_name (s)
+        self.refits = 0
+        self.ambient_events = 0
+        self._learned: Optional[tuple[float, float]] = None  # (period, phase) from learn()
+        self._ambient: list[float] = []
+        self._latencies: list[float] = []
+        self._pending: list[float] = []  # Deadlines whose triggered event hasn't arrived
+        self._last_deadline: Optional[float] = None
+        self._seen = 0
+
+    def _new_arrivals(self) -> list[float]:
+        """Arrivals of the tag on system_name since the last call, in order."""
+        events = self.collector.get_all_events()
+        arrivals = sorted(
+            e.arrival_perf_time for e in events[self._seen:]
+            if e.node_id == self.node_id and e.system_name == self.system_name
+        )
+        self._seen = len(events)
+        return arrivals
+
+    def learn(self) -> bool:
+        """Initial period (median gap) and phase from the arrivals so far; False if too few."""
+        arrivals = self._new_arrivals()
+        gaps = [b - a for a, b in zip(arrivals, arrivals[1:])]
+        if len(gaps) < 2 or statistics.median(gaps) <= 0:
+            return False
+        self.period = statistics.median(gaps)
+        self.phase = arrivals[-1]
+        self._ambient = arrivals[-self.window:]
+        self.ambient_events = len(arrivals)
+        self._refit()
+        self._learned = (self.period, self.phase)
+        return True
+
+    def _refit(self) -> None:
+        """Least-squares period and phase over the recent ambient arrivals."""
+        cycles = [round((t - self.phase) / self.period) for t in self._ambient]
+        if len(set(cycles)) < 2:
+            return
+        # Slope and intercept by hand (statistics.linear_regression needs Python 3.10)
+        mean_c = statistics.fmean(cycles)
+        mean_t = statistics.fmean(self._ambient)
+        sxx = sum((c - mean_c) ** 2 for c in cycles)
+        sxy = sum((c - mean_c) * (t - mean_t) for c, t in zip(cycles, self._ambient))
+        period = sxy / sxx
+        phase = mean_t - period * mean_c
+        # A missed or doubled cycle can throw the fit; keep the previous estimate then
+        if abs(period - self.period) > 0.2 * self.period:
+            return
+        self.period, self.phase = period, phase
+        self.refits += 1
+
+    def update(self) -> None:
+        """Classify new arrivals as triggered or ambient and re-estimate lead, period and phase."""
+        refit = False
+        for arrival in self._new_arrivals():
+            claimed = None
+            while self._pending and self._pending[0] <= arrival:
+                claimed = self._pending.pop(0)
+            if claimed is not None:
+                latency = arrival - claimed
+                typical = statistics.median(self._latencies) if len(self._latencies) >= 3 else None
+                if typical is None or abs(latency - typical) < self.period / 2:
+                    self._latencies = (self._latencies + [latency])[-self.lead_window:]
+                    continue
+            self._ambient = (self._ambient + [arrival])[-self.window:]
+            self.ambient_events += 1
+            refit = True
+        if self._latencies:
+            self.lead = statistics.median(self._latencies)
+        if refit:
+            self._refit()
+
+    def align(self, nominal: float) -> float:
+        """
+        Deadline near `nominal` whose event is expected midway between two ambient arrivals.
+
+        Never earlier than now or the previous aligned deadline; with --interval shorter
+        than the ambient period that skips to the next free slot.
+        """
+        self.update()
+        slot = round((nominal + self.lead - self.phase) / self.period - 0.5)
+        deadline = self.phase + (slot + 0.5) * self.period - self.lead
+        floor = time.perf_counter()
+        if self._last_deadline is not None:
+            floor = max(floor, self._last_deadline)
+        while deadline <= floor:
+            deadline += self.period
+        self._last_deadline = deadline
+        self._pending.append(deadline)
+        return deadline
+
+    def summary(self) -> str:
+        learned_period, learned_phase = self._learned
+        # Shift of the current phase against the cycle learned before triggering
+        cycles = round((self.phase - learned_phase) / learned_period)
+        drift_ms = (self.phase - (learned_phase + cycles * learned_period)) * 1000
+        return (
+            f"Ambient cycle ({self.system_name}): period {self.period:.3f}s (learned {learned_period:.3f}s), "
+            f"phase drift {drift_ms:+.1f}ms, {self.refits} refit(s) from {self.ambient_events} ambient events, "
+            f"trigger lead {self.lead * 1000:.0f}ms"
+        )
+
+
+async def learn_ambient_cycle(
+    collector: EventCollector, node_id: str, system_name: str, duration: float
+) -> Optional[AmbientPhaseTracker]:
+    """Listen for `duration` seconds without triggering and learn the tag's ambient cycle; None if too few events."""
+    tracker = AmbientPhaseTracker(collector, node_id, system_name)
+    print(f"Learning the ambient locate cycle of {node_id} on {system_name} for {duration:.0f}s")
+    await asyncio.sleep(duration)
+    if not tracker.learn():
+        print("  Warning: not enough ambient events to phase-lock; triggering unaligned")
+        return None
+    print(f"  Ambient period {tracker.period:.3f}s from {tracker.ambient_events} events")
+    return tracker
+
+
+TIMER_SPIN = 0.002        # Seconds before a deadline the precision timer stops sleeping and polls
+TIMER_HARD_SPIN = 0.0002  # Final stretch busy-waited without yielding to the event loop
+
+
+async def sleep_until(deadline: float, spin: float = TIMER_SPIN) -> float:
+    """
+    Wait until the perf_counter() deadline with sub-millisecond precision.
+
+    asyncio.sleep wakes a millisecond or more late depending on loop load, so it only
+    covers the time up to `spin` seconds before the deadline; the loop is then polled
+    (yielding to other tasks) and the last TIMER_HARD_SPIN seconds are busy-waited.
+    spin=0 is a plain asyncio.sleep. Returns perf_counter() at wake-up.
+    """
+    coarse = deadline - spin - time.perf_counter()
+    if coarse > 0:
+        await asyncio.sleep(coarse)
+    if spin <= 0:
+        return time.perf_counter()
+    while deadline - time.perf_counter() > TIMER_HARD_SPIN:
+        await asyncio.sleep(0)
+    while (now := time.perf_counter()) < deadline:
+        pass
+    return now
+
+
+async def trigger_loop(
+    rest_client: Rest,
+    system_id,
+    api_node_type: str,
     num_triggers: int,
     trigger_interval: float,
     debug: bool = False,
+    concurrency: int = 10,
+    socket_ab: int = 0,
+    schedule: Optional[list[float]] = None,
+    rotate_ids: bool = False,
+    first_index: int = 1,
+    quiet: bool = False,
+    repeat_count: int = 0,
+    backoff_ms: int = 2000,
+    timer_spin: float = TIMER_SPIN,
+    align: Optional[Callable[[float], float]] = None,
+    stop: Optional[Callable[[list[Trigger]], bool]] = None,
+    duration: Optional[float] = None,
 ) -> list[Trigger]:
-    """Fire N locate triggers at a configurable interval, returning Trigger metadata."""
+    """
+    Fire N locate triggers at a configurable interval, returning Trigger metadata.
+
+    system_id may be a single ID or a list; with several IDs each trigger round fans
+    out across all of them via Rest.post_many (at most `concurrency` POSTs in flight),
+    producing one Trigger per (round, system_id) that share the round's index. With
+    rotate_ids each round instead triggers the next ID in turn, so every tag sees the
+    rate divided by the number of tags.
+
+    Open loop: round i fires at the absolute deadline epoch + (i - 1) * trigger_interval,
+    or epoch + schedule[i - 1] when a schedule of offsets is given (see
+    build_trigger_schedule), and runs as its own task, so a slow POST never delays the
+    rounds after it and the rate doesn't drop under load. Deadlines are waited for with
+    sleep_until (timer_spin seconds of polling before each one). Each Trigger records
+    its deadline (scheduled_perf) and when the timer fired (fired_perf); lateness_ms is
+    how far behind the deadline the request actually left the host. align, when given, maps
+    each nominal deadline to the one actually used (see AmbientPhaseTracker.align).
+    stop, when given, is asked with the triggers so far before each round and ends
+    the schedule early once it returns True (see AutoStop). With duration, the
+    schedule also ends at the first deadline more than duration seconds after the
+    start, since aligned deadlines can drift past the end of the nominal schedule.
+
+    With socket_ab > 0 the REST socket profile alternates between low-latency and
+    default every socket_ab rounds (A/B windows). Switching replaces the pooled
+    connections, so the previous window's POSTs are awaited first and a fresh warm
+    connection is opened before the window's first deadline; if that overruns the
+    deadline, the rest of the schedule shifts by the overrun.
+
+    Rounds are numbered from first_index; quiet prints only failed triggers.
+    repeat_count/backoff_ms are passed on to every locate (server-side repeats).
+    """
+    system_ids = [system_id] if isinstance(system_id, str) else list(system_id)
     triggers: list[Trigger] = []
-    for i in range(1, num_triggers + 1):
-        t0 = time.perf_counter()
-        t0_utc = datetime.now(timezone.utc)
-        response = await trigger_locate(rest_client, system_id, api_node_type)
-        api_rt_ms = (time.perf_counter() - t0) * 1000
-
-        action_id = ""
-        if isinstance(response, dict):
-            action_id = response.get("action_id", "")
-
-        trigger = Trigger(
-            index=i,
-            timestamp_utc=t0_utc,
-            perf_time=t0,
-            api_response_time_ms=api_rt_ms,
-            action_id=action_id,
-        )
-        triggers.append(trigger)
-        print(f"  Trigger {i}/{num_triggers} sent (api_rt={api_rt_ms:.0f}ms, action_id={action_id})")
+    in_flight: set[asyncio.Task] = set()
+
+    async def fire_round(index: int, scheduled: float, fired: float) -> None:
+        profile_name = rest_client.socket_profile.name
+        t_round = time.perf_counter()
+        round_ids = [system_ids[(index - first_index) % len(system_ids)]] if rotate_ids else system_ids
+        if len(round_ids) == 1:
+            round_triggers = [await _send_trigger(
+                rest_client, index, round_ids[0], api_node_type, echo=not quiet,
+                repeat_count=repeat_count, backoff_ms=backoff_ms,
+            )]
+        else:
+            if debug:
+                print(f"  POST nodes/<{len(round_ids)} system IDs>/action (concurrency={concurrency})")
+            round_triggers = await _send_trigger_round(
+                rest_client, index, round_ids, api_node_type, concurrency, repeat_count, backoff_ms
+            )
+        round_ms = (time.perf_counter() - t_round) * 1000
+
+        for trigger in round_triggers:
+            trigger.scheduled_perf = scheduled
+            trigger.fired_perf = fired
+            trigger.dispatched_perf = t_round
+            trigger.socket_profile = profile_name
+            triggers.append(trigger)
+            if not quiet or trigger.error:
+                _print_trigger(trigger, num_triggers if first_index == 1 else 0, show_system_id=len(system_ids) > 1)
+        if len(round_ids) > 1 and not quiet:
+            print(f"  Round {index}/{num_triggers}: {len(round_triggers)} POSTs in {round_ms:.0f}ms")
+
+    if schedule is None:
+        schedule = [i * trigger_interval for i in range(num_triggers)]
+    epoch = time.perf_counter()
+    try:
+        for n in range(num_triggers):
+            i = first_index + n
+            if stop is not None and stop(triggers):
+                break
+            deadline = epoch + schedule[n]
+            if align is not None:
+                deadline = align(deadline)
+            if duration is not None and deadline > epoch + duration:
+                break
+            if socket_ab > 0:
+                profile = SOCKET_PROFILES[SOCKET_AB_ORDER[(n // socket_ab) % 2]]
+                if profile is not rest_client.socket_profile:
+                    if in_flight:
+                        await asyncio.gather(*in_flight)
+                    await rest_client.set_socket_profile(profile)
+                    await rest_client.warm_up()
+                    # Shift the schedule by the switch overrun rather than firing a burst to catch up
+                    overrun = time.perf_counter() - deadline
+                    if overrun > 0:
+                        epoch += overrun
+                        deadline += overrun
+
+            rest_client.set_next_request_time(deadline)
+            fired = await sleep_until(deadline, timer_spin)
+            task = asyncio.create_task(fire_round(i, deadline, fired))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+        if in_flight:
+            await asyncio.gather(*in_flight)
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+    triggers.sort(key=lambda t: (t.index, t.perf_time))
+    return triggers
 
-        # Sleep between triggers (except after last)
-        if i < num_triggers:
-            sleep_time = trigger_interval - (api_rt_ms / 1000)
-            if sleep_time > 0:
-                await asyncio.sleep(sleep_time)
 
+async def trigger_on_arrival_loop(
+    rest_client: Rest,
+    system_id,
+    api_node_type: str,
+    collector: EventCollector,
+    systems: list[str],
+    duration: float,
+    deadlines: dict[str, float],
+    settle: float,
+    debug: bool = False,
+    concurrency: int = 10,
+    repeat_count: int = 0,
+    backoff_ms: int = 2000,
+    stop: Optional[Callable[[list[Trigger]], bool]] = None,
+) -> list[Trigger]:
+    """
+    Closed loop: fire the next locate as soon as the previous one's event has arrived on
+    every connected system (or that system's deadline has passed), plus `settle` seconds.
+
+    Each trigger window then holds one triggered event per system instead of idling
+    through a long fixed interval. deadlines maps system name -> seconds after the POST
+    left the host. New triggers stop after `duration`; the listeners keep running
+    through the drain phase (drain_events), so the last window is never cut off.
+
+    With server-side repeats the settle time is extended by the repeat span
+    (repeat_count * backoff_ms), so a trigger's last repeat lands in its own window.
+    stop ends the loop early as in trigger_loop.
+    """
+    system_ids = [system_id] if isinstance(system_id, str) else list(system_id)
+    triggers: list[Trigger] = []
+    start = time.perf_counter()
+    index = clean = 0
+    settle += repeat_count * backoff_ms / 1000
+    while index == 0 or (time.perf_counter() < start + duration and not (stop is not None and stop(triggers))):
+        index += 1
+        if len(system_ids) == 1:
+            round_triggers = [await _send_trigger(
+                rest_client, index, system_ids[0], api_node_type, repeat_count=repeat_count, backoff_ms=backoff_ms
+            )]
+        else:
+            if debug:
+                print(f"  POST nodes/<{len(system_ids)} system IDs>/action (concurrency={concurrency})")
+            round_triggers = await _send_trigger_round(
+                rest_client, index, system_ids, api_node_type, concurrency, repeat_count, backoff_ms
+            )
+        for trigger in round_triggers:
+            trigger.socket_profile = rest_client.socket_profile.name
+            triggers.append(trigger)
+            _print_trigger(trigger, 0, show_system_id=len(system_ids) > 1)
+
+        sent = [t.perf_time for t in round_triggers if not t.error]
+        if sent:
+            after = min(sent)
+            arrived = await collector.wait_for_arrivals(
+                system_ids, {s: after + deadlines[s] for s in systems}, after
+            )
+            missing = [s for s in systems if s not in arrived]
+            if missing:
+                print(f"  Trigger {index}: no event from {', '.join(missing)} before the deadline")
+            else:
+                clean += 1
+        rest_client.set_next_request_time(time.perf_counter() + settle)
+        await asyncio.sleep(settle)
+
+    minutes = (time.perf_counter() - start) / 60
+    print(
+        f"Closed loop: {index} triggers, {clean} with an event on every system "
+        f"({clean / minutes:.1f} clean samples/min)"
+    )
+    triggers.sort(key=lambda t: (t.index, t.perf_time))
     return triggers
 
 
+def _percentile(values: list[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of values (unsorted), or None when empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * pct / 100))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def format_latency_distributions(
+    triggers: list[Trigger],
+    assigned: dict[int, list[tuple[CollectedEvent, float]]],
+    connected_systems: list[str],
+) -> Optional[str]:
+    """
+    Raw vs coordinated-omission-corrected first-event latency per system, None if unscheduled.
+
+    raw:       from when the POST actually left the host
+    intended:  from the trigger's scheduled deadline, so scheduler and event-loop stalls count
+
+    The schedule is open loop, so every deadline a stall overran still gets its own
+    trigger, measured from its own deadline: intended already is the corrected
+    distribution, and back-filling samples for those deadlines would count each stall twice.
+    """
+    by_index = {}
+    for trigger in triggers:
+        by_index.setdefault(trigger.index, trigger)
+    if not any(t.scheduled_perf is not None for t in by_index.values()):
+        return None
+    raw: dict[str, list[float]] = {}
+    intended: dict[str, list[float]] = {}
+    for index, events in assigned.items():
+        trigger = by_index.get(index)
+        if trigger is None or trigger.error:
+            continue
+        late_ms = (trigger.perf_time - trigger.intended_perf) * 1000
+        first: dict[str, float] = {}
+        for event, latency_ms in events:
+            first.setdefault(event.system_name, latency_ms)
+        for system_name, latency_ms in first.items():
+            raw.setdefault(system_name, []).append(latency_ms)
+            intended.setdefault(system_name, []).append(latency_ms + late_ms)
+
+    pcts = (50, 90, 99, 99.9)
+    lines = [
+        "Latency distributions (first event per trigger, ms; intended = from the scheduled "
+        "deadline, i.e. corrected for coordinated omission):",
+        f"  {'':<10} {'':<9} " + " ".join(f"{'p' + format(p, 'g'):>8}" for p in pcts) + f" {'max':>8} {'n':>6}",
+    ]
+    for system_name in connected_systems:
+        if system_name not in raw:
+            continue
+        rows = (
+            ("raw", raw[system_name]),
+            ("intended", intended[system_name]),
+        )
+        for i, (name, values) in enumerate(rows):
+            cells = " ".join(f"{_percentile(values, p):8.1f}" for p in pcts)
+            label = system_name if i == 0 else ""
+            lines.append(f"  {label:<10} {name:<9} {cells} {max(values):8.1f} {len(values):>6}")
+    return "\n".join(lines)
+
+
+def format_lateness_summary(triggers: list[Trigger]) -> Optional[str]:
+    """
+    Percentiles of scheduler lateness, None if unscheduled: timer wake-up vs deadline,
+    send task start vs timer wake-up (dispatch), and request sent vs deadline.
+    """
+    rows = [
+        ("timer", [t.timer_lateness_ms for t in triggers if t.timer_lateness_ms is not None]),
+        ("dispatch", [t.dispatch_lag_ms for t in triggers if t.dispatch_lag_ms is not None]),
+        ("sent", [t.lateness_ms for t in triggers if t.lateness_ms is not None and not t.error]),
+    ]
+    lines = []
+    for name, values in rows:
+        if not values:
+            continue
+        cells = ", ".join(f"p{pct:g}={_percentile(values, pct):.3f}" for pct in (50, 90, 99, 99.9))
+        lines.append(f"  {name:<8} {cells}, max={max(values):.3f} (n={len(values)})")
+    if not lines:
+        return None
+    return "\n".join(["Scheduler lateness (ms; timer and sent vs deadline, dispatch after the timer):"] + lines)
+
+
+@dataclass
+class CapacityStep:
+    """One steady-state window of the capacity search."""
+    rate: float                     # Target locates/s across all tags
+    achieved_rate: float            # Locates actually sent per second
+    triggers: int
+    latencies: dict[str, list[float]] = field(default_factory=dict)  # system -> first-event latency (ms) per trigger
+    missing: dict[str, int] = field(default_factory=dict)            # system -> triggers without an event
+
+    def percentile(self, system_name: str, pct: float) -> Optional[float]:
+        """Latency percentile with missing events counted as infinitely late."""
+        values = self.latencies.get(system_name, []) + [math.inf] * self.missing.get(system_name, 0)
+        return _percentile(values, pct)
+
+    def meets_slo(self, system_name: str, slo_ms: float, pct: float) -> bool:
+        value = self.percentile(system_name, pct)
+        return value is not None and value <= slo_ms
+
+
+def _evaluate_capacity_step(
+    rate: float,
+    duration: float,
+    step_triggers: list[Trigger],
+    all_triggers: list[Trigger],
+    events: list[CollectedEvent],
+    systems: list[str],
+) -> CapacityStep:
+    """Per-system first-event latencies of one step's triggers, attributing events per tag."""
+    sent = [t for t in step_triggers if not t.error]
+    step = CapacityStep(rate=rate, achieved_rate=len(sent) / duration, triggers=len(sent))
+    step_keys = {(t.system_id, t.index) for t in sent}
+    for system_id in {t.system_id for t in sent}:
+        assigned = assign_events_to_triggers(
+            [e for e in events if e.node_id == system_id],
+            [t for t in all_triggers if t.system_id == system_id],
+        )
+        for index, trigger_events in assigned.items():
+            if (system_id, index) not in step_keys:
+                continue
+            first: dict[str, float] = {}
+            for event, latency_ms in trigger_events:
+                first.setdefault(event.system_name, latency_ms)
+            for system_name in systems:
+                if system_name in first:
+                    step.latencies.setdefault(system_name, []).append(first[system_name])
+                else:
+                    step.missing[system_name] = step.missing.get(system_name, 0) + 1
+    return step
+
+
+async def capacity_search(
+    rest_client: Rest,
+    system_ids: list[str],
+    api_node_type: str,
+    collector: EventCollector,
+    systems: list[str],
+    slo_ms: dict[str, float],
+    slo_percentile: float = 95.0,
+    search: str = "step",
+    rate_start: float = 0.5,
+    rate_step: Optional[float] = None,
+    rate_max: float = 10.0,
+    step_duration: float = 60.0,
+    drain: float = 10.0,
+    iterations: int = 4,
+    concurrency: int = 10,
+    debug: bool = False,
+) -> tuple[list[Trigger], list[CapacityStep]]:
+    """
+    Search the trigger rate (locates/s across all tags) at which per-system latency breaks the SLO.
+
+    Each step holds the rate open loop for step_duration seconds, rotating through the
+    tags so each tag sees rate / len(system_ids) (events stay attributable while one
+    tag's interval exceeds its latency), then drains for `drain` seconds before it is
+    evaluated. A system meets the SLO when its slo_percentile of first-event latency
+    (missing events count as infinitely late) is within slo_ms.
+
+    step:   rate_start, rate_start + rate_step, ... until every system breaks or rate_max.
+    binary: double from rate_start until some system breaks, then bisect between the last
+            passing and the first failing rate for `iterations` steps.
+    """
+    triggers: list[Trigger] = []
+    steps: list[CapacityStep] = []
+
+    async def run_step(rate: float) -> CapacityStep:
+        count = max(1, int(rate * step_duration))
+        print(f"Capacity step: {rate:.3g} locates/s for {step_duration:.0f}s ({count} triggers)")
+        step_triggers = await trigger_loop(
+            rest_client, system_ids, api_node_type, count, 1.0 / rate, debug=debug,
+            concurrency=concurrency, rotate_ids=True, first_index=len(triggers) + 1, quiet=True,
+        )
+        await asyncio.sleep(drain)
+        triggers.extend(step_triggers)
+        step = _evaluate_capacity_step(rate, step_duration, step_triggers, triggers, collector.get_all_events(), systems)
+        steps.append(step)
+        for system_name in systems:
+            value = step.percentile(system_name, slo_percentile)
+            verdict = "ok" if step.meets_slo(system_name, per_system(slo_ms, system_name), slo_percentile) else "SLO BROKEN"
+            print(
+                f"  {system_name}: p{slo_percentile:g}={_fmt_ms(value, 0) if value is not None and value != math.inf else '-'}ms "
+                f"({len(step.latencies.get(system_name, []))} events, {step.missing.get(system_name, 0)} missing) {verdict}"
+            )
+        return step
+
+    def all_ok(step: CapacityStep) -> bool:
+        return all(step.meets_slo(s, per_system(slo_ms, s), slo_percentile) for s in systems)
+
+    if search == "binary":
+        passing, failing = None, None
+        rate = rate_start
+        while rate <= rate_max:
+            if all_ok(await run_step(rate)):
+                passing = rate
+                rate *= 2
+            else:
+                failing = rate
+                break
+        if failing is not None:
+            for _ in range(iterations):
+                rate = (passing + failing) / 2 if passing is not None else failing / 2
+                if all_ok(await run_step(rate)):
+                    passing = rate
+                else:
+                    failing = rate
+    else:
+        rate_step = rate_step or rate_start
+        rate = rate_start
+        broken: set[str] = set()
+        while rate <= rate_max + 1e-9 and len(broken) < len(systems):
+            step = await run_step(rate)
+            broken.update(s for s in systems if not step.meets_slo(s, per_system(slo_ms, s), slo_percentile))
+            rate += rate_step
+
+    return triggers, steps
+
+
+def format_capacity_curve(
+    steps: list[CapacityStep],
+    systems: list[str],
+    slo_ms: dict[str, float],
+    slo_percentile: float,
+) -> str:
+    """Throughput-vs-latency curve per system, ordered by rate, with the knee marked."""
+    lines = ["=" * 80, f"Capacity curve (SLO: p{slo_percentile:g} within the per-system limit)", "=" * 80]
+    for system_name in systems:
+        limit = per_system(slo_ms, system_name)
+        ok_rates = [s.rate for s in steps if s.meets_slo(system_name, limit, slo_percentile)]
+        knee = max(ok_rates) if ok_rates else None
+        knee_text = f"{knee:.3g} locates/s" if knee is not None else "below the lowest rate tested"
+        lines.append(f"{system_name} (SLO {limit:.0f}ms) - knee: {knee_text}")
+        lines.append(f"  {'rate/s':>8} {'sent/s':>8} {'events':>7} {'missing':>7} {'p50':>8} {'p90':>8} {'p99':>8}  SLO")
+        for step in sorted(steps, key=lambda s: s.rate):
+            cells = []
+            for pct in (50, 90, 99):
+                value = step.percentile(system_name, pct)
+                cells.append("-" if value is None or value == math.inf else f"{value:.0f}")
+            lines.append(
+                f"  {step.rate:>8.3g} {step.achieved_rate:>8.3g} {len(step.latencies.get(system_name, [])):>7} "
+                f"{step.missing.get(system_name, 0):>7} {cells[0]:>8} {cells[1]:>8} {cells[2]:>8}  "
+                + ("ok" if step.meets_slo(system_name, limit, slo_percentile) else "broken")
+                + ("  <- knee" if knee is not None and step.rate == knee else "")
+            )
+    return "\n".join(lines)
+
+
+def write_capacity_csv(
+    steps: list[CapacityStep],
+    systems: list[str],
+    system_id: str,
+    slo_ms: dict[str, float],
+    slo_percentile: float,
+) -> str:
+    """Write the capacity curve, one row per (step, system). Returns the filename written."""
+    timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filepath = Path(__file__).resolve().parent / f"capacity_{system_id}_{timestamp_str}.csv"
+    with open(filepath, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            "target_rate", "achieved_rate", "system", "events", "missing",
+            "p50_ms", "p90_ms", "p99_ms", f"p{slo_percentile:g}_ms", "slo_ms", "slo_ok",
+        ])
+        for step in steps:
+            for system_name in systems:
+                cells = []
+                for pct in (50, 90, 99, slo_percentile):
+                    value = step.percentile(system_name, pct)
+                    cells.append("" if value is None or value == math.inf else f"{value:.1f}")
+                limit = per_system(slo_ms, system_name)
+                writer.writerow([
+                    f"{step.rate:.4g}", f"{step.achieved_rate:.4g}", system_name,
+                    len(step.latencies.get(system_name, [])), step.missing.get(system_name, 0),
+                    *cells, f"{limit:.0f}", "1" if step.meets_slo(system_name, limit, slo_percentile) else "0",
+                ])
+    return str(filepath)
+
+
+DRAIN_WINDOW = 1000  # Recent triggers whose first-event latencies the drain grace is learned from
+DRAIN_MARGIN = 1.5   # Drain grace = DRAIN_MARGIN x their p99.9
+DRAIN_MIN_GRACE = 1.0  # Seconds; floor for systems with only a few fast samples
+DRAIN_EARLIEST_PERCENTILE = 1  # Drain only accepts events at least this percentile of latency after the send
+
+
+def first_event_latencies(
+    triggers: list[Trigger], events: list[CollectedEvent]
+) -> list[tuple[Trigger, dict[str, float]]]:
+    """Each sent trigger with its first-event latency (ms) per system, attributing events per tag."""
+    result = []
+    for system_id in {t.system_id for t in triggers}:
+        tag_triggers = [t for t in triggers if t.system_id == system_id and not t.error]
+        by_index = {t.index: t for t in tag_triggers}
+        assigned = assign_events_to_triggers([e for e in events if e.node_id == system_id], tag_triggers)
+        for index, trigger_events in assigned.items():
+            first: dict[str, float] = {}
+            for event, latency_ms in trigger_events:
+                first.setdefault(event.system_name, latency_ms)
+            result.append((by_index[index], first))
+    return result
+
+
+def recent_first_event_latencies(triggers: list[Trigger], events: list[CollectedEvent]) -> dict[str, list[float]]:
+    """First-event latencies (ms) per system of the last DRAIN_WINDOW triggers, oldest first."""
+    latencies: dict[str, list[tuple[float, float]]] = {}  # system -> [(trigger perf_time, latency_ms)]
+    for trigger, first in first_event_latencies(triggers, events):
+        for system_name, latency_ms in first.items():
+            latencies.setdefault(system_name, []).append((trigger.perf_time, latency_ms))
+    return {
+        system_name: [latency for _, latency in sorted(values)[-DRAIN_WINDOW:]]
+        for system_name, values in latencies.items()
+    }
+
+
+def drain_grace_periods(recent: dict[str, list[float]], systems: list[str], drain_max: float) -> dict[str, float]:
+    """
+    Per-system drain grace in seconds, learned from the run itself.
+
+    DRAIN_MARGIN x the p99.9 of the recent first-event latencies
+    (recent_first_event_latencies), at least DRAIN_MIN_GRACE and at most drain_max;
+    a system without any events yet gets drain_max.
+    """
+    grace = {}
+    for system_name in systems:
+        p999 = _percentile(recent.get(system_name, []), 99.9)
+        if p999 is None:
+            grace[system_name] = drain_max
+        else:
+            grace[system_name] = min(drain_max, max(DRAIN_MIN_GRACE, DRAIN_MARGIN * p999 / 1000))
+    return grace
+
+
+def drain_earliest_arrivals(recent: dict[str, list[float]], systems: list[str]) -> dict[str, float]:
+    """
+    Per-system seconds after the send before an event can be the trigger's answer.
+
+    The DRAIN_EARLIEST_PERCENTILE of the recent first-event latencies; 0 for a system
+    without any events yet.
+    """
+    earliest = {}
+    for system_name in systems:
+        low = _percentile(recent.get(system_name, []), DRAIN_EARLIEST_PERCENTILE)
+        earliest[system_name] = 0.0 if low is None else low / 1000
+    return earliest
+
+
+async def drain_events(
+    collector: EventCollector,
+    triggers: list[Trigger],
+    systems: list[str],
+    drain_max: float,
+    repeat_span: float = 0.0,
+) -> set[str]:
+    """
+    Drain phase after the last trigger: keep listening until every system has an event
+    for each tag's last sent trigger, or until that system's grace period (see
+    drain_grace_periods) has passed since the trigger. Events of earlier triggers can
+    no longer change their assignment, so the last trigger per tag decides completeness.
+    Only events at least the system's learned minimum latency after the send count
+    (drain_earliest_arrivals), so an ambient locate landing right after the last send
+    doesn't end the drain early. With server-side repeats the wait is for the last
+    repeat, repeat_span seconds later.
+
+    Returns the systems whose events all arrived.
+    """
+    last_sent: dict[str, float] = {}
+    for trigger in triggers:
+        if not trigger.error:
+            last_sent[trigger.system_id] = max(last_sent.get(trigger.system_id, 0.0), trigger.perf_time)
+    if not last_sent:
+        return set()
+    recent = recent_first_event_latencies(triggers, collector.get_all_events())
+    grace = drain_grace_periods(recent, systems, drain_max)
+    earliest = drain_earliest_arrivals(recent, systems)
+    after = {system_id: sent + repeat_span for system_id, sent in last_sent.items()}
+    latest = max(after.values())
+    start = time.perf_counter()
+    print(
+        "Draining events ("
+        + ", ".join(f"{s}: after {earliest[s] * 1000:.0f}ms, grace {grace[s]:.1f}s" for s in systems)
+        + ")"
+    )
+    arrived = await collector.wait_for_arrivals(
+        list(last_sent), {s: latest + grace[s] for s in systems}, after, min_delay=earliest
+    )
+    missing = [s for s in systems if s not in arrived]
+    waited = time.perf_counter() - start
+    if missing:
+        print(f"  Drain ended after {waited:.1f}s: grace expired for {', '.join(missing)}")
+    else:
+        print(f"  Drain complete after {waited:.1f}s: last trigger has an event on every system")
+    return arrived
+
+
+def quantile_ci(values: list[float], q: float, confidence: float) -> Optional[tuple[float, float, float]]:
+    """
+    Distribution-free confidence interval of the q-quantile: (estimate, low, high).
+
+    Uses the order statistics whose ranks bound n*q by z * sqrt(n*q*(1-q)) (normal
+    approximation of the binomial); None until there are enough samples for both ranks.
+    """
+    n = len(values)
+    if n == 0:
+        return None
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+    half = z * math.sqrt(n * q * (1 - q))
+    low_rank, high_rank = math.floor(n * q - half), math.ceil(n * q + half)
+    if low_rank < 1 or high_rank > n:
+        return None
+    ordered = sorted(values)
+    return _percentile(ordered, q * 100), ordered[low_rank - 1], ordered[high_rank - 1]
+
+
+AUTO_STOP_STATS = {"median": 0.5, "p95": 0.95}
+
+
+@dataclass
+class AutoStop:
+    """
+    Sequential-sampling stop rule: keep triggering until the target statistic is precise enough.
+
+    The statistic (median or p95 of first-event latency) is estimated per connected
+    system, or for the paired per-trigger ILaaS - ZLP delta, with a distribution-free
+    confidence interval (quantile_ci). The run stops once every interval is at most
+    ci_width_ms wide and rests on at least min_samples triggers. check() re-evaluates
+    at most every check_every seconds.
+
+    It runs inside the trigger loop, so evaluate() is incremental: each call only files
+    the events and triggers added since the last one (bisect into per-tag arrival
+    lists, with the same event-to-trigger rule as assign_events_to_triggers). A
+    trigger is counted once it is older than the drain grace (drain_grace_periods of
+    the samples so far, at most drain_max), so triggers whose slow events are still in
+    flight don't bias the statistic low.
+    """
+    ci_width_ms: float
+    stat: str = "median"
+    confidence: float = 0.95
+    paired: bool = False
+    min_samples: int = 30
+    check_every: float = 5.0
+    drain_max: float = 30.0
+    estimates: dict[str, Optional[tuple[float, float, float]]] = field(default_factory=dict, init=False)
+    samples: dict[str, int] = field(default_factory=dict, init=False)
+    reached: bool = field(default=False, init=False)  # Set once check() stopped the run
+    _last_check: float = field(default=0.0, init=False, repr=False)
+    _events_seen: int = field(default=0, init=False, repr=False)
+    _triggers_seen: int = field(default=0, init=False, repr=False)
+    # (tag, system) -> sorted arrival perf_times; tag -> sorted send perf_times, and how
+    # many of those are already counted; system (or "ILaaS-ZLP") -> counted samples in ms
+    _arrivals: dict[tuple[str, str], list[float]] = field(default_factory=dict, init=False, repr=False)
+    _sent: dict[str, list[float]] = field(default_factory=dict, init=False, repr=False)
+    _counted: dict[str, int] = field(default_factory=dict, init=False, repr=False)
+    _latencies: dict[str, list[float]] = field(default_factory=dict, init=False, repr=False)
+
+    def evaluate(
+        self, triggers: list[Trigger], events: list[CollectedEvent], systems: list[str], now: Optional[float] = None
+    ) -> bool:
+        """
+        Fold in new events and matured triggers and recompute the intervals; True when all
+        of them are narrow enough. triggers and events must only ever be appended to
+        between calls. Pass now=math.inf after the drain to count every trigger.
+        """
+        now = time.perf_counter() if now is None else now
+        for event in events[self._events_seen:]:
+            bisect.insort(self._arrivals.setdefault((event.node_id, event.system_name), []), event.arrival_perf_time)
+        self._events_seen = len(events)
+        for trigger in triggers[self._triggers_seen:]:
+            if not trigger.error:
+                sent = self._sent.setdefault(trigger.system_id, [])
+                pos = bisect.bisect_right(sent, trigger.perf_time)
+                sent.insert(pos, trigger.perf_time)
+                # A slow POST reported after later triggers were counted is skipped, not counted twice
+                if pos < self._counted.get(trigger.system_id, 0):
+                    self._counted[trigger.system_id] += 1
+        self._triggers_seen = len(triggers)
+
+        recent = {name: values[-DRAIN_WINDOW:] for name, values in self._latencies.items()}
+        horizon = now - max(drain_grace_periods(recent, systems, self.drain_max).values(), default=0.0)
+        for tag, sent in self._sent.items():
+            i = self._counted.get(tag, 0)
+            while i < len(sent) and sent[i] <= horizon:
+                window_end = sent[i + 1] if i + 1 < len(sent) else math.inf
+                first: dict[str, float] = {}
+                for system_name in systems:
+                    arrivals = self._arrivals.get((tag, system_name), [])
+                    j = bisect.bisect_left(arrivals, sent[i])
+                    if j < len(arrivals) and arrivals[j] < window_end:
+                        first[system_name] = (arrivals[j] - sent[i]) * 1000
+                if self.paired:
+                    if "ILaaS" in first and "ZLP" in first:
+                        self._latencies.setdefault("ILaaS-ZLP", []).append(first["ILaaS"] - first["ZLP"])
+                else:
+                    for system_name, latency_ms in first.items():
+                        self._latencies.setdefault(system_name, []).append(latency_ms)
+                i += 1
+            self._counted[tag] = i
+
+        names = ["ILaaS-ZLP"] if self.paired else systems
+        q = AUTO_STOP_STATS[self.stat]
+        self.estimates = {name: quantile_ci(self._latencies.get(name, []), q, self.confidence) for name in names}
+        self.samples = {name: len(self._latencies.get(name, [])) for name in names}
+        return all(
+            ci is not None and ci[2] - ci[1] <= self.ci_width_ms and self.samples[name] >= self.min_samples
+            for name, ci in self.estimates.items()
+        )
+
+    def check(self, triggers: list[Trigger], events: list[CollectedEvent], systems: list[str]) -> bool:
+        """Rate-limited evaluate() for the trigger loop; prints the current intervals."""
+        now = time.perf_counter()
+        if now - self._last_check < self.check_every:
+            return False
+        self._last_check = now
+        self.reached = self.evaluate(triggers, events, systems)
+        print("  Precision: " + self.format())
+        return self.reached
+
+    def format(self) -> str:
+        parts = []
+        for name, ci in self.estimates.items():
+            if ci is None:
+                parts.append(f"{name} {self.stat} - (n={self.samples[name]}, too few)")
+            else:
+                parts.append(
+                    f"{name} {self.stat} {ci[0]:.0f}ms [{ci[1]:.0f}, {ci[2]:.0f}] "
+                    f"width {ci[2] - ci[1]:.0f} (n={self.samples[name]})"
+                )
+        return ", ".join(parts) + f"; target width {self.ci_width_ms:g}ms at {self.confidence:.0%}"
+
+
+def parse_per_system(value: str) -> dict[str, float]:
+    """
+    Parse a per-system option: a default value and optional per-system overrides,
+    e.g. "5" or "5,ZLP=10". Returns system name -> value ("*" holds the default).
+    """
+    values: dict[str, float] = {}
+    try:
+        for part in value.split(","):
+            name, sep, number = part.strip().rpartition("=")
+            if sep and name not in ("WiFi-Cloud", "ILaaS", "ZLP"):
+                raise argparse.ArgumentTypeError(f"unknown system '{name}' (use WiFi-Cloud, ILaaS or ZLP)")
+            values[name if sep else "*"] = float(number)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid value '{value}' (e.g. 5 or 5,ZLP=10)")
+    if "*" not in values:
+        raise argparse.ArgumentTypeError(f"'{value}' needs a default value for all systems (e.g. 5,ZLP=10)")
+    return values
+
+
+def per_system(values: dict[str, float], system_name: str) -> float:
+    """Value of a parse_per_system() option for one system."""
+    return values.get(system_name, values["*"])
+
+
+ARRIVAL_PROCESSES = ("fixed", "poisson", "jitter", "burst", "ramp-linear", "ramp-step")
+
+
+def build_trigger_schedule(
+    process: str,
+    duration: float,
+    interval: float,
+    rng: random.Random,
+    jitter: float = 0.25,
+    burst_size: int = 5,
+    burst_spacing: float = 0.0,
+    ramp_end_interval: Optional[float] = None,
+    ramp_steps: int = 4,
+) -> list[float]:
+    """
+    Trigger offsets in seconds from the start of the run, for an arrival process over [0, duration).
+
+    fixed:       one trigger every `interval`
+    poisson:     exponential gaps with mean `interval` (rate 1/interval)
+    jitter:      the fixed grid with each deadline moved by up to +-jitter * interval
+    burst:       `burst_size` triggers `burst_spacing` apart, every burst_size * interval
+    ramp-linear: rate rises linearly from 1/interval to 1/ramp_end_interval
+    ramp-step:   the same ramp in `ramp_steps` equal-length steps of constant rate
+
+    All randomness comes from rng, so a seed reproduces the schedule exactly. Offsets
+    are returned in ascending order. Raises ValueError for parameters that can't make
+    a schedule (see the checks below).
+    """
+    if interval <= 0:
+        raise ValueError("interval must be positive")
+    if ramp_end_interval is not None and ramp_end_interval <= 0:
+        raise ValueError("ramp_end_interval must be positive")
+    if burst_spacing < 0:
+        raise ValueError("burst_spacing must not be negative")
+    if process == "burst" and burst_spacing * (burst_size - 1) >= burst_size * interval:
+        raise ValueError("a burst must fit in its period (burst_spacing * (burst_size - 1) < burst_size * interval)")
+    count = max(1, int(duration // interval))
+    if process == "fixed":
+        return [i * interval for i in range(count)]
+    if process == "jitter":
+        return sorted(max(0.0, i * interval + rng.uniform(-jitter, jitter) * interval) for i in range(count))
+
+    offsets = []
+    if process == "poisson":
+        t = 0.0
+        while t < duration:
+            offsets.append(t)
+            t += rng.expovariate(1.0 / interval)
+    elif process == "burst":
+        period = interval * burst_size
+        k = 0
+        while k * period < duration:
+            offsets.extend(
+                k * period + j * burst_spacing for j in range(burst_size) if k * period + j * burst_spacing < duration
+            )
+            k += 1
+    elif process in ("ramp-linear", "ramp-step"):
+        start_rate = 1.0 / interval
+        end_rate = 1.0 / (ramp_end_interval or interval / 4)
+        t = 0.0
+        while t < duration:
+            offsets.append(t)
+            progress = t / duration
+            if process == "ramp-step":
+                steps = max(1, ramp_steps)
+                progress = min(int(progress * steps), steps - 1) / max(1, steps - 1)
+            t += 1.0 / (start_rate + (end_rate - start_rate) * progress)
+    else:
+        raise ValueError(f"Unknown arrival process '{process}'")
+    return sorted(offsets)
+
+
+def save_trigger_schedule(system_id: str, process: str, seed: int, params: dict, offsets: list[float]) -> str:
+    """Write the arrival process, seed and generated schedule next to the CSVs; returns the path."""
+    timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filepath = Path(__file__).resolve().parent / f"trigger_schedule_{system_id}_{timestamp_str}.json"
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump(
+            {"process": process, "seed": seed, "params": params, "offsets_s": [round(t, 6) for t in offsets]},
+            f,
+            indent=2,
+        )
+    return str(filepath)
+
+
+SOCKET_AB_ORDER = ("low-latency", "default")
+
+
+def format_socket_ab_report(
+    triggers: list[Trigger],
+    assigned: dict[int, list[tuple[CollectedEvent, float]]],
+    connected_systems: list[str],
+) -> str:
+    """
+    Compare latencies of triggers sent with each REST socket profile (--socket-ab).
+
+    Per system the first event of each trigger counts; failed triggers are skipped.
+    """
+    by_index = {}
+    for trigger in triggers:
+        by_index.setdefault(trigger.index, trigger)
+    metrics: dict[str, dict[str, list[float]]] = {}
+
+    def add(metric, profile, value):
+        metrics.setdefault(metric, {}).setdefault(profile, []).append(value)
+
+    for trigger in triggers:
+        if trigger.error:
+            continue
+        add("POST response", trigger.socket_profile, trigger.api_response_time_ms)
+        if trigger.http_timing is not None and trigger.http_timing.ttfb_ms is not None:
+            add("POST ttfb", trigger.socket_profile, trigger.http_timing.ttfb_ms)
+    for index, events in assigned.items():
+        trigger = by_index.get(index)
+        if trigger is None or trigger.error:
+            continue
+        first: dict[str, float] = {}
+        for event, latency_ms in events:
+            first.setdefault(event.system_name, latency_ms)
+        for system_name in connected_systems:
+            if system_name in first:
+                add(system_name, trigger.socket_profile, first[system_name])
+
+    a, b = SOCKET_AB_ORDER
+    lines = [f"Socket profile A/B ({a} vs {b}, p50 / mean in ms):"]
+    for metric, per_profile in metrics.items():
+        va, vb = per_profile.get(a, []), per_profile.get(b, [])
+        if not va or not vb:
+            lines.append(f"  {metric:<14} not enough samples ({a}: {len(va)}, {b}: {len(vb)})")
+            continue
+        diff = statistics.median(va) - statistics.median(vb)
+        lines.append(
+            f"  {metric:<14} {a} {statistics.median(va):7.1f} / {statistics.fmean(va):7.1f} (n={len(va)})  "
+            f"{b} {statistics.median(vb):7.1f} / {statistics.fmean(vb):7.1f} (n={len(vb)})  "
+            f"p50 diff {diff:+.1f}"
+        )
+    return "\n".join(lines)
+
+
 def assign_events_to_triggers(
     events: list[CollectedEvent],
     triggers: list[Trigger],
@@ -700,14 +2210,114 @@ def assign_events_to_triggers(
     return result
 
 
+def attribute_repeats(
+    assigned: dict[int, list[tuple[CollectedEvent, float]]],
+    repeat_count: int,
+    backoff_ms: float,
+) -> dict[tuple[int, str, str], int]:
+    """
+    Attribute each trigger's events to the server-side repeat expected to produce them.
+
+    Repeat k of a locate is emitted k * backoff_ms after repeat 0. Per system, the
+    median first-event latency across triggers anchors repeat 0, and an event goes to
+    the expected repeat nearest its latency. Events beyond the last repeat, or landing
+    on a repeat that already has an event, stay unattributed (ambient locates).
+
+    Returns: {(trigger_index, system_name, meas_id): repeat} for attributed events.
+    """
+    firsts: dict[str, list[float]] = {}
+    for events in assigned.values():
+        seen: set[str] = set()
+        for event, latency_ms in events:
+            if event.system_name not in seen:
+                seen.add(event.system_name)
+                firsts.setdefault(event.system_name, []).append(latency_ms)
+    baseline = {name: statistics.median(values) for name, values in firsts.items()}
+
+    result: dict[tuple[int, str, str], int] = {}
+    for index, events in assigned.items():
+        taken: set[tuple[str, int]] = set()
+        for event, latency_ms in events:
+            repeat = round((latency_ms - baseline[event.system_name]) / backoff_ms)
+            if 0 <= repeat <= repeat_count and (event.system_name, repeat) not in taken:
+                taken.add((event.system_name, repeat))
+                result[(index, event.system_name, event.meas_id)] = repeat
+    return result
+
+
+def format_repeat_report(
+    triggers: list[Trigger],
+    assigned: dict[int, list[tuple[CollectedEvent, float]]],
+    repeats: dict[tuple[int, str, str], int],
+    connected_systems: list[str],
+    repeat_count: int,
+    backoff_ms: float,
+) -> str:
+    """
+    Per-repeat latencies of server-side repeat locates (--repeat-count).
+
+    latency: arrival - (trigger sent + k * backoff_ms), i.e. measured from the repeat's
+    expected emission; repeat 0 includes the REST/API ingress path, later repeats don't
+    go through it again. drift: (arrival of repeat k - arrival of repeat 0) - k * backoff_ms,
+    the device-side repeat timing error, free of API ingress jitter.
+    """
+    sent = {t.index for t in triggers if not t.error}
+    per_repeat: dict[tuple[str, int], list[float]] = {}
+    drift: dict[tuple[str, int], list[float]] = {}
+    unattributed: dict[str, int] = {}
+    for index, events in assigned.items():
+        if index not in sent:
+            continue
+        arrival0: dict[str, float] = {}
+        for event, latency_ms in events:
+            repeat = repeats.get((index, event.system_name, event.meas_id))
+            if repeat is None:
+                unattributed[event.system_name] = unattributed.get(event.system_name, 0) + 1
+                continue
+            per_repeat.setdefault((event.system_name, repeat), []).append(latency_ms - repeat * backoff_ms)
+            if repeat == 0:
+                arrival0[event.system_name] = event.arrival_perf_time
+            elif event.system_name in arrival0:
+                spacing_ms = (event.arrival_perf_time - arrival0[event.system_name]) * 1000
+                drift.setdefault((event.system_name, repeat), []).append(spacing_ms - repeat * backoff_ms)
+
+    lines = [
+        f"Server-side repeats ({repeat_count} per locate, backoff {backoff_ms:g}ms; "
+        f"latency from expected emission, p50 / mean in ms):"
+    ]
+    for system_name in connected_systems:
+        for repeat in range(repeat_count + 1):
+            values = per_repeat.get((system_name, repeat), [])
+            if not values:
+                lines.append(f"  {system_name:<10} repeat {repeat}: no events (0/{len(sent)})")
+                continue
+            line = (
+                f"  {system_name:<10} repeat {repeat}: {statistics.median(values):7.1f} / "
+                f"{statistics.fmean(values):7.1f} ({len(values)}/{len(sent)})"
+            )
+            spacing = drift.get((system_name, repeat))
+            if spacing:
+                line += f"  drift vs repeat 0 p50 {statistics.median(spacing):+.1f}"
+            lines.append(line)
+        if unattributed.get(system_name):
+            lines.append(f"  {system_name:<10} unattributed events: {unattributed[system_name]}")
+    return "\n".join(lines)
+
+
 def format_trigger_results_table(
     triggers: list[Trigger],
     assigned: dict[int, list[tuple[CollectedEvent, float]]],
     system_id: str,
     trigger_interval: float,
     connected_systems: list[str],
+    exclude_retried: bool = False,
 ) -> str:
-    """Format per-trigger results as a console table with inter-event gap tracking."""
+    """
+    Format per-trigger results as a console table with inter-event gap tracking.
+
+    Retried/hedged triggers are marked with '*' and failed ones with '!'; with
+    exclude_retried their events are left out of the average latencies.
+    """
     lines = []
     system_order = ["WiFi-Cloud", "ILaaS", "ZLP"]
     columns = [s for s in system_order if s in connected_systems]
@@ -749,7 +2359,7 @@ def format_trigger_results_table(
 
     for trigger in triggers:
         trigger_events = assigned.get(trigger.index, [])
-        trigger_label = f"#{trigger.index}"
+        trigger_label = f"#{trigger.index}" + ("!" if trigger.error else "*" if trigger.retried else "")
         trigger_time_str = trigger.timestamp_utc.strftime("%H:%M:%S.%f")[:-3]
 
         if not trigger_events:
@@ -800,9 +2410,15 @@ def format_trigger_results_table(
     lines.append(f"Average events/trigger: {avg_events:.1f}")
 
     # Per-system average latency across all triggers
+    flagged = {t.index for t in triggers if t.retried or t.error}
+    if flagged:
+        note = "excluded from averages" if exclude_retried else "included in averages"
+        lines.append(f"  Retried (*) or failed (!) triggers: {len(flagged)} ({note})")
     for col in columns:
         all_latencies = []
-        for evts in assigned.values():
+        for trigger_index, evts in assigned.items():
+            if exclude_retried and trigger_index in flagged:
+                continue
             for event, latency_ms in evts:
                 if event.system_name == col:
                     all_latencies.append(latency_ms)
@@ -820,16 +2436,93 @@ def format_trigger_results_table(
     return "\n".join(lines)
 
 
+def _fmt_ms(value: Optional[float], digits: int = 1) -> str:
+    """Format an optional millisecond value, empty string when missing."""
+    return "" if value is None else f"{value:.{digits}f}"
+
+
+def _http_timing_columns(trigger: Trigger) -> list[str]:
+    """CSV cells for the per-phase HTTP timing of a trigger's POST."""
+    timing = trigger.http_timing
+    outcomes = ";".join(
+        f"{a.number}{'h' if a.hedged else ''}:{a.outcome}" for a in trigger.attempts
+    )
+    limits = [a.concurrency_limit for a in trigger.attempts if a.concurrency_limit is not None]
+    limit = f"{limits[-1]:.2f}" if limits else ""
+    if timing is None:
+        return ["", "", "", "", "", str(len(trigger.attempts)), outcomes, limit, "", "", "", trigger.socket_profile]
+    return [
+        "1" if timing.connection_reused else "0",
+        _fmt_ms(timing.dns_ms),
+        _fmt_ms(timing.connect_ms),
+        _fmt_ms(timing.send_ms),
+        _fmt_ms(timing.ttfb_ms),
+        str(len(trigger.attempts)),
+        outcomes,
+        limit,
+        timing.peer_ip or "",
+        "" if timing.tls_resumed is None else ("1" if timing.tls_resumed else "0"),
+        _fmt_ms(timing.tls_handshake_ms),
+        trigger.socket_profile,
+    ]
+
+
+def _server_time_columns(
+    trigger: Trigger,
+    sys_data: dict[str, tuple[float, CollectedEvent]],
+    clock: Optional[ClockSync],
+) -> list[str]:
+    """
+    CSV cells placing each system's server timestamps on our timebase via the clock offset.
+
+    <system>_server_ms: trigger sent -> the event's server `timestamp`;
+    <system>_delivery_ms: the event's published (or server) timestamp -> arrival here.
+    """
+    server_cols, delivery_cols = [], []
+    for sys_name in ("WiFi-Cloud", "ILaaS", "ZLP"):
+        server_ms = delivery_ms = ""
+        if clock is not None and clock.offset is not None and sys_name in sys_data:
+            _, event = sys_data[sys_name]
+            stamped = parse_server_timestamp(event.loc_info.get("timestamp"))
+            published = parse_server_timestamp(event.loc_info.get("published_timestamp")) or stamped
+            if stamped is not None:
+                server_ms = f"{(clock.to_local(stamped) - trigger.perf_time) * 1000:.1f}"
+            if published is not None:
+                delivery_ms = f"{(event.arrival_perf_time - clock.to_local(published)) * 1000:.1f}"
+        server_cols.append(server_ms)
+        delivery_cols.append(delivery_ms)
+    return server_cols + delivery_cols
+
+
 def write_trigger_results_csv(
     triggers: list[Trigger],
     assigned: dict[int, list[tuple[CollectedEvent, float]]],
     system_id: str,
+    endpoint_ips: Optional[dict[str, Optional[str]]] = None,
+    endpoint_tls: Optional[dict[str, Optional[str]]] = None,
+    clock: Optional[ClockSync] = None,
+    repeats: Optional[dict[tuple[int, str, str], int]] = None,
+    backoff_ms: float = 0.0,
 ) -> str:
     """
     Write per-trigger results to a CSV file with inter-event gap columns.
 
+    endpoint_ips maps system name -> websocket server address, written on every row
+    so latencies can be grouped by backend address; endpoint_tls likewise carries
+    each websocket's TLS handshake (see websocket_tls_info). With a clock, server
+    timestamps of the events are converted to our timebase; clock_err_ms is the
+    error bound of those columns. repeats (see attribute_repeats) fills repeat_index
+    and repeat_emission_ms, the repeat's expected emission after the trigger.
+
     Returns the filename written.
     """
+    endpoint_ips = endpoint_ips or {}
+    endpoint_tls = endpoint_tls or {}
+    ip_cols = [endpoint_ips.get(name) or "" for name in ("WiFi-Cloud", "ILaaS", "ZLP")]
+    ip_cols += [endpoint_tls.get(name) or "" for name in ("WiFi-Cloud", "ILaaS", "ZLP")]
+    clock_err = ""
+    if clock is not None and clock.uncertainty is not None:
+        clock_err = f"{clock.uncertainty * 1000:.1f}"
     timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"latency_per_trigger_{system_id}_{timestamp_str}.csv"
     filepath = Path(__file__).resolve().parent / filename
@@ -843,16 +2536,35 @@ def write_trigger_results_csv(
             "trigger_index", "trigger_time", "api_response_time_ms",
             "meas_id", "wifi_cloud_latency_ms", "ilaas_latency_ms", "zlp_latency_ms",
             "wifi_cloud_gap_s", "ilaas_gap_s", "zlp_gap_s",
+            "http_conn_reused", "http_dns_ms", "http_connect_ms", "http_send_ms", "http_ttfb_ms",
+            "http_attempts", "http_attempt_outcomes", "concurrency_limit", "http_peer_ip",
+            "http_tls_resumed", "http_tls_handshake_ms", "socket_profile",
+            "wifi_cloud_ip", "ilaas_ip", "zlp_ip", "wifi_cloud_tls", "ilaas_tls", "zlp_tls",
+            "wifi_cloud_server_ms", "ilaas_server_ms", "zlp_server_ms",
+            "wifi_cloud_delivery_ms", "ilaas_delivery_ms", "zlp_delivery_ms", "clock_err_ms",
+            "scheduled_time", "lateness_ms", "timer_lateness_ms", "dispatch_lag_ms", "repeat_index", "repeat_emission_ms",
         ])
 
         for trigger in triggers:
             trigger_events = assigned.get(trigger.index, [])
             trigger_time_str = trigger.timestamp_utc.isoformat(timespec="milliseconds")
+            http_cols = _http_timing_columns(trigger)
+            schedule_cols = [
+                trigger.scheduled_utc.isoformat(timespec="milliseconds") if trigger.scheduled_utc else "",
+                _fmt_ms(trigger.lateness_ms, 2),
+                _fmt_ms(trigger.timer_lateness_ms, 3),
+                _fmt_ms(trigger.dispatch_lag_ms, 3),
+            ]
 
             if not trigger_events:
                 writer.writerow([
                     trigger.index, trigger_time_str, f"{trigger.api_response_time_ms:.1f}",
                     "", "", "", "", "", "", "",
+                    *http_cols,
+                    *ip_cols,
+                    "", "", "", "", "", "", clock_err,
+                    *schedule_cols,
+                    "", "",
                 ])
                 continue
 
@@ -877,6 +2589,12 @@ def write_trigger_results_csv(
                     else:
                         gaps[sys_name] = ""
 
+                repeat = None
+                if repeats:
+                    repeat = next(
+                        (repeats[k] for k in ((trigger.index, s, meas_id) for s in sys_data) if k in repeats), None
+                    )
+
                 writer.writerow([
                     trigger.index,
                     trigger_time_str,
@@ -888,6 +2606,13 @@ def write_trigger_results_csv(
                     gaps["WiFi-Cloud"],
                     gaps["ILaaS"],
                     gaps["ZLP"],
+                    *http_cols,
+                    *ip_cols,
+                    *_server_time_columns(trigger, sys_data, clock),
+                    clock_err,
+                    *schedule_cols,
+                    "" if repeat is None else repeat,
+                    "" if repeat is None else f"{repeat * backoff_ms:.0f}",
                 ])
 
     return str(filepath)
@@ -898,16 +2623,90 @@ async def main() -> int:
     args = parser.parse_args()
 
     env = args.env
-    system_id = args.system_id
+    # Comma-separated IDs, duplicates dropped (a tag triggered twice per round would skew its latency)
+    system_ids = list(dict.fromkeys(s.strip() for s in args.system_id.split(",") if s.strip()))
+    if not system_ids:
+        parser.error("system_id must name at least one node")
     node_type = args.node_type
     interval = args.interval
     timeout = args.timeout
     debug = args.debug
     output_format = args.output_format
 
-    # Auto-compute trigger count and interval from --interval and --timeout
-    num_triggers = max(1, int(timeout // interval))
+    # Trigger schedule from the arrival process over --timeout (fixed: one every --interval)
+    if interval <= 0:
+        parser.error("--interval must be positive")
+    if not 0 <= args.jitter <= 0.5:
+        parser.error("--jitter must be between 0 and 0.5")
+    if args.burst_size < 1 or args.ramp_steps < 1:
+        parser.error("--burst-size and --ramp-steps must be at least 1")
+    if args.ramp_end_interval is not None and args.ramp_end_interval <= 0:
+        parser.error("--ramp-end-interval must be positive")
+    if args.burst_spacing < 0:
+        parser.error("--burst-spacing must not be negative")
+    if args.arrival == "burst" and args.burst_spacing * (args.burst_size - 1) >= args.burst_size * interval:
+        parser.error("a burst must fit in its period: --burst-spacing * (--burst-size - 1) < --burst-size * --interval")
+    if args.closed_loop and args.socket_ab > 0:
+        parser.error("--socket-ab is not supported with --closed-loop")
+    if args.capacity_search and (args.closed_loop or args.socket_ab > 0):
+        parser.error("--capacity-search can't be combined with --closed-loop or --socket-ab")
+    if args.phase_lock and (args.closed_loop or args.capacity_search):
+        parser.error("--phase-lock can't be combined with --closed-loop or --capacity-search")
+    if args.phase_lock and args.socket_ab > 0:
+        parser.error("--phase-lock can't be combined with --socket-ab (profile switches shift the aligned deadlines)")
+    if args.phase_lock and len(system_ids) > 1:
+        parser.error("--phase-lock needs a single system ID (each tag has its own ambient cycle)")
+    if args.target_ci_ms is not None:
+        if args.target_ci_ms <= 0 or not 0 < args.confidence < 1 or args.max_duration <= 0:
+            parser.error("--target-ci-ms and --max-duration must be positive and --confidence between 0 and 1")
+        if args.capacity_search:
+            parser.error("--target-ci-ms can't be combined with --capacity-search")
+        if args.target_delta and not (args.ws_ilaas and args.zlp_url):
+            parser.error("--target-delta needs both --ws-ilaas and --zlp-url")
+        # Auto-stop: the schedule covers the hard cap and the stop rule ends it early
+        timeout = args.max_duration
+    elif args.target_delta:
+        parser.error("--target-delta requires --target-ci-ms")
+    if args.json_decoder not in ("auto", *FRAME_DECODERS):
+        parser.error(f"--json-decoder {args.json_decoder} is not installed (pip install {args.json_decoder})")
+    if args.timer_spin < 0:
+        parser.error("--timer-spin must not be negative")
+    if args.drain_max < 0:
+        parser.error("--drain-max must not be negative")
+    if args.repeat_count < 0 or args.repeat_backoff <= 0:
+        parser.error("--repeat-count must be >= 0 and --repeat-backoff positive")
+    if args.capacity_search and args.repeat_count > 0:
+        parser.error("--repeat-count is not supported with --capacity-search")
+    if args.capacity_search:
+        if not 0 < args.rate_start <= args.rate_max:
+            parser.error("--rate-start must be positive and at most --rate-max")
+        if args.rate_step is not None and args.rate_step <= 0:
+            parser.error("--rate-step must be positive")
+        if args.step_duration <= 0 or args.step_drain < 0:
+            parser.error("--step-duration must be positive and --step-drain not negative")
+        if not 0 < args.slo_percentile <= 100:
+            parser.error("--slo-percentile must be in (0, 100]")
+        if args.search_iterations < 0:
+            parser.error("--search-iterations must not be negative")
+    seed = args.seed if args.seed is not None else random.SystemRandom().randrange(2**32)
+    schedule_params = {
+        "duration": timeout,
+        "interval": interval,
+        "jitter": args.jitter,
+        "burst_size": args.burst_size,
+        "burst_spacing": args.burst_spacing,
+        "ramp_end_interval": args.ramp_end_interval,
+        "ramp_steps": args.ramp_steps,
+    }
+    schedule = build_trigger_schedule(args.arrival, rng=random.Random(seed), **schedule_params)
+    num_triggers = len(schedule)
     trigger_interval = interval
+    repeat_span = args.repeat_count * args.repeat_backoff / 1000
+    if repeat_span >= interval and not (args.closed_loop or args.capacity_search):
+        print(
+            f"Warning: {args.repeat_count} repeats x {args.repeat_backoff}ms outlast the {interval}s interval; "
+            f"late repeats will be assigned to the next trigger"
+        )
 
     # Build websocket list from provided URLs (plain websocket connections)
     websocket_configs = []
@@ -933,11 +2732,42 @@ async def main() -> int:
     api_node_type = normalize_node_type(node_type)
     env_config = load_env_config(env)
     api_config = Config(env_config["base_url"], env_config["user"], env_config["pw"])
-    rest_client = Rest(api_config)
+    retry_policy = RetryPolicy(
+        max_attempts=1 + max(0, args.retries),
+        budget=args.retry_budget,
+        hedge_percentile=args.hedge_percentile,
+    )
+    limiter = None
+    if args.adaptive_concurrency:
+        limiter = AdaptiveLimiter(initial=min(4, args.concurrency), max_limit=args.concurrency)
+    resolver = PinnedResolver(ttl=args.dns_ttl) if args.pin_dns else None
+    # One TLS context for REST, websockets and ZLP, so new connections resume TLS sessions
+    tls_context = ResumingTLSContext()
+    socket_profile = SOCKET_PROFILES[args.socket_profile]
+    frame_decoder = get_frame_decoder(args.json_decoder)
+    record_file = None
+    rest_client = Rest(
+        api_config, retry_policy=retry_policy, limiter=limiter, resolver=resolver, ssl_context=tls_context,
+        # A/B windows start with the low-latency profile; listeners keep --socket-profile throughout
+        socket_profile=SOCKET_PROFILES[SOCKET_AB_ORDER[0]] if args.socket_ab > 0 else socket_profile,
+        clock=ClockSync(),
+    )
+    zlp_http_session = None
+    if zlp_enabled:
+        zlp_http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(resolver=resolver, ssl=tls_context, **socket_profile.connector_kwargs())
+        )
+    endpoint_ips: dict[str, Optional[str]] = {}  # system name -> websocket server address
+    endpoint_tls: dict[str, Optional[str]] = {}  # system name -> websocket TLS handshake
 
     if env_config.get("token_file"):
         rest_client.config.REST_TOKEN_FILE = env_config["token_file"]
 
+    # Fetch the API token while the websockets connect, so no trigger waits on authenticate
+    token_prefetch = asyncio.create_task(rest_client.prefetch_token())
+    # Seed the server clock offset from Date headers (also opens the REST connection)
+    clock_prime = asyncio.create_task(rest_client.sample_clock(args.clock_samples))
+
     # Connect ALL websockets before triggering (ensures listeners ready)
     total_connections = len(websocket_configs) + (1 if zlp_enabled else 0)
     print(f"Connecting to {total_connections} websocket(s)...")
@@ -972,7 +2802,12 @@ async def main() -> int:
             ws = await websockets.connect(
                 url,
                 additional_headers=extra_headers if extra_headers else None,
+                **(await pinned_connect_kwargs(resolver, url)),
+                **tls_connect_kwargs(tls_context, url),
             )
+            endpoint_ips[name] = websocket_peer_ip(ws)
+            endpoint_tls[name] = websocket_tls_info(ws)
+            apply_websocket_socket_profile(ws, socket_profile)
 
             # ILaaS requires subscription message after connecting
             if name == "ILaaS":
@@ -1008,41 +2843,188 @@ async def main() -> int:
     # Connect ZLP Socket.IO (before trigger, like other websockets)
     zlp_client = None
     if zlp_enabled:
-        zlp_client = await connect_zlp(args.zlp_url, args.zlp_token, debug)
+        zlp_client = await connect_zlp(
+            args.zlp_url, args.zlp_token, debug, http_session=zlp_http_session, decoder=frame_decoder
+        )
+        if zlp_client and zlp_client.eio.ws is not None:
+            endpoint_ips["ZLP"] = websocket_peer_ip(zlp_client.eio.ws)
+            endpoint_tls["ZLP"] = websocket_tls_info(zlp_client.eio.ws)
+
+    if endpoint_ips:
+        print("  Websocket endpoints: " + ", ".join(f"{n}={ip or '?'}" for n, ip in endpoint_ips.items()))
+    if any(endpoint_tls.values()):
+        print("  Websocket TLS: " + ", ".join(f"{n}={info}" for n, info in endpoint_tls.items() if info))
 
     if not connections and not zlp_client:
         print("Error: No websocket connections established")
+        token_prefetch.cancel()
+        clock_prime.cancel()
+        await asyncio.gather(token_prefetch, clock_prime, return_exceptions=True)
+        await rest_client.close()
+        if zlp_http_session:
+            await zlp_http_session.close()
+        if resolver:
+            await resolver.close()
         return 1
 
     connected_systems = connected_names + (["ZLP"] if zlp_client else [])
 
     try:
-        print(f"Triggering locate every {interval}s for {timeout}s ({num_triggers} triggers)")
+        try:
+            await token_prefetch
+        except Exception as e:
+            print(f"Error: Could not fetch API token - {e}")
+            return 1
+        rest_client.start_token_refresher()
+
+        # Open the REST connection now so the first trigger doesn't pay DNS/TCP/TLS
+        await clock_prime
+        await rest_client.warm_up()
+        if args.keep_warm_idle > 0:
+            rest_client.start_keep_warm(idle=args.keep_warm_idle)
+
+        if args.capacity_search:
+            print(f"Capacity search ({args.capacity_search}) from {args.rate_start} to {args.rate_max} locates/s")
+        elif args.closed_loop:
+            print(f"Triggering locate on arrival (settle {args.settle}s) for {timeout}s")
+        elif args.arrival == "fixed":
+            print(f"Triggering locate every {interval}s for {timeout}s ({num_triggers} triggers)")
+        else:
+            print(f"Triggering locate ({args.arrival}, mean gap {interval}s, seed {seed}) for {timeout}s ({num_triggers} triggers)")
+        auto_stop = None
+        if args.target_ci_ms is not None:
+            auto_stop = AutoStop(
+                ci_width_ms=args.target_ci_ms, stat=args.target_stat,
+                confidence=args.confidence, paired=args.target_delta, drain_max=args.drain_max,
+            )
+            target = "the ILaaS-ZLP delta" if args.target_delta else "every system"
+            print(
+                f"  Auto-stop once the {args.target_stat} of {target} has a {args.confidence:.0%} CI "
+                f"within {args.target_ci_ms:g}ms (at most {timeout:.0f}s)"
+            )
+        if output_format in ("csv", "both") and not (args.closed_loop or args.capacity_search):
+            schedule_path = save_trigger_schedule(system_ids[0], args.arrival, seed, schedule_params, schedule)
+            print(f"Trigger schedule written to: {schedule_path}")
 
         collector = EventCollector()
 
-        # Listeners run for the full test duration
+        # Listeners run until the trigger phase and its drain are done, which then stop them
+        listen_timeout = 7 * 24 * 3600
+        if args.record_frames:
+            record_file = open(args.record_frames, "ab")
         listener_tasks = [
-            listen_for_location(name, ws, system_id, 0.0, timeout, debug, collector=collector)
+            asyncio.ensure_future(listen_for_location(
+                name, ws, system_ids, 0.0, listen_timeout, debug,
+                collector=collector, decoder=frame_decoder, record=record_file,
+            ))
             for name, ws in connections
         ]
         if zlp_client:
-            listener_tasks.append(listen_zlp_for_location(
-                sio=zlp_client, system_id=system_id, t_trigger=0.0,
-                timeout=timeout, debug=debug, collector=collector,
-            ))
+            listener_tasks.append(asyncio.ensure_future(listen_zlp_for_location(
+                sio=zlp_client, system_id=system_ids, t_trigger=0.0,
+                timeout=listen_timeout, debug=debug, collector=collector,
+            )))
+
+        capacity_steps: list[CapacityStep] = []
+
+        async def run_capacity_search() -> list[Trigger]:
+            try:
+                search_triggers, steps = await capacity_search(
+                    rest_client=rest_client,
+                    system_ids=system_ids,
+                    api_node_type=api_node_type,
+                    collector=collector,
+                    systems=connected_systems,
+                    slo_ms=args.slo_ms,
+                    slo_percentile=args.slo_percentile,
+                    search=args.capacity_search,
+                    rate_start=args.rate_start,
+                    rate_step=args.rate_step,
+                    rate_max=args.rate_max,
+                    step_duration=args.step_duration,
+                    drain=args.step_drain,
+                    iterations=args.search_iterations,
+                    concurrency=args.concurrency,
+                    debug=debug,
+                )
+                capacity_steps.extend(steps)
+                return search_triggers
+            finally:
+                for task in listener_tasks:
+                    task.cancel()
+
+        async def run_and_drain(trigger_phase) -> list[Trigger]:
+            try:
+                run_triggers = await trigger_phase
+                await drain_events(collector, run_triggers, connected_systems, args.drain_max, repeat_span)
+                if auto_stop is not None:
+                    if auto_stop.reached:
+                        print(f"Auto-stop: precision target reached after {len(run_triggers)} triggers")
+                    else:
+                        print("Auto-stop: --max-duration reached before the precision target")
+                    # Everything has drained now, so every trigger counts
+                    auto_stop.evaluate(run_triggers, collector.get_all_events(), connected_systems, now=math.inf)
+                    print("  Final: " + auto_stop.format())
+                return run_triggers
+            finally:
+                for task in listener_tasks:
+                    task.cancel()
+
+        stop = None
+        if auto_stop is not None:
+            def stop(run_triggers: list[Trigger]) -> bool:
+                return auto_stop.check(run_triggers, collector.get_all_events(), connected_systems)
 
         # Build trigger loop task
-        trigger_task = trigger_loop(
-            rest_client=rest_client,
-            system_id=system_id,
-            api_node_type=api_node_type,
-            num_triggers=num_triggers,
-            trigger_interval=trigger_interval,
-            debug=debug,
-        )
+        if args.capacity_search:
+            trigger_task = run_capacity_search()
+        elif args.closed_loop:
+            deadlines = {s: per_system(args.arrival_deadline, s) for s in connected_systems}
+            trigger_task = run_and_drain(trigger_on_arrival_loop(
+                rest_client=rest_client,
+                system_id=system_ids,
+                api_node_type=api_node_type,
+                collector=collector,
+                systems=connected_systems,
+                duration=timeout,
+                deadlines=deadlines,
+                settle=args.settle,
+                debug=debug,
+                concurrency=args.concurrency,
+                repeat_count=args.repeat_count,
+                backoff_ms=args.repeat_backoff,
+                stop=stop,
+            ))
+        else:
+            async def run_trigger_loop() -> list[Trigger]:
+                # Phase lock: learn the ambient cycle on the first connected system, then align
+                tracker = None
+                if args.phase_lock:
+                    tracker = await learn_ambient_cycle(collector, system_ids[0], connected_systems[0], args.phase_learn)
+                loop_triggers = await trigger_loop(
+                    rest_client=rest_client,
+                    system_id=system_ids,
+                    api_node_type=api_node_type,
+                    num_triggers=num_triggers,
+                    trigger_interval=trigger_interval,
+                    debug=debug,
+                    concurrency=args.concurrency,
+                    socket_ab=args.socket_ab,
+                    schedule=schedule,
+                    repeat_count=args.repeat_count,
+                    backoff_ms=args.repeat_backoff,
+                    timer_spin=args.timer_spin / 1000,
+                    align=tracker.align if tracker is not None else None,
+                    stop=stop,
+                    duration=timeout,
+                )
+                if tracker is not None:
+                    print(tracker.summary())
+                return loop_triggers
 
-        # Run listeners and trigger loop concurrently
+            trigger_task = run_and_drain(run_trigger_loop())
+
+        # Run listeners and trigger loop (with its drain phase) concurrently
         all_results = await asyncio.gather(*listener_tasks, trigger_task, return_exceptions=True)
 
         # Last result is from trigger_loop
@@ -1061,31 +3043,122 @@ async def main() -> int:
             return 1
 
         triggers = trigger_result
-        events = collector.get_all_events()
-        assigned = assign_events_to_triggers(events, triggers)
-
-        # Output results
-        if output_format in ("console", "both"):
-            table = format_trigger_results_table(
-                triggers=triggers,
-                assigned=assigned,
-                system_id=system_id,
-                trigger_interval=trigger_interval,
-                connected_systems=connected_systems,
+        if capacity_steps:
+            print(format_capacity_curve(capacity_steps, connected_systems, args.slo_ms, args.slo_percentile))
+            if output_format in ("csv", "both"):
+                capacity_path = write_capacity_csv(
+                    capacity_steps, connected_systems, system_ids[0], args.slo_ms, args.slo_percentile
+                )
+                print(f"Capacity curve written to: {capacity_path}")
+        rest_stats = rest_client.stats
+        print(
+            f"REST connections: {rest_stats['connections_created']} opened, "
+            f"{rest_stats['connections_reused']} reused ({rest_stats['requests']} requests, "
+            f"{rest_stats['keep_warm_pings']} keep-warm pings, {rest_stats['clock_pings']} clock pings)"
+        )
+        lateness = format_lateness_summary(triggers)
+        if lateness:
+            print(lateness)
+        cold_triggers = [
+            f"#{t.index}" + (f" [{t.system_id}]" if len(system_ids) > 1 else "") for t in triggers
+            if t.http_timing is not None and not t.http_timing.connection_reused
+        ]
+        if cold_triggers:
+            print(f"  Triggers sent on a cold connection: {', '.join(cold_triggers)}")
+        clock = rest_client.clock
+        if clock.offset is not None:
+            print(
+                f"Server clock: {clock.wall_offset() * 1000:+.1f}ms vs local wall clock, "
+                f"±{clock.uncertainty * 1000:.1f}ms ({clock.samples} Date samples"
+                + (f", {clock.rejected} rejected" if clock.rejected else "")
+                + (f", {clock.resets} reset(s)" if clock.resets else "") + ")"
             )
-            print(table)
-
-        if output_format in ("csv", "both"):
-            csv_path = write_trigger_results_csv(
-                triggers=triggers,
-                assigned=assigned,
-                system_id=system_id,
+        if tls_context.stats["handshakes"]:
+            print(
+                f"TLS handshakes: {tls_context.stats['handshakes']} "
+                f"({tls_context.stats['resumed']} resumed), all connections"
             )
-            print(f"CSV written to: {csv_path}")
+        if resolver is not None:
+            for entry in resolver.history:
+                print(
+                    f"  DNS pinned {entry['host']} -> {entry['ip']} "
+                    f"({entry['resolve_ms']}ms, candidates: {', '.join(entry['candidates'])})"
+                )
+        rest_ips = sorted({t.http_timing.peer_ip for t in triggers if t.http_timing and t.http_timing.peer_ip})
+        if rest_ips:
+            print(f"  REST server address(es) used: {', '.join(rest_ips)}")
+        if limiter is not None:
+            print(f"Adaptive concurrency: final limit {limiter.limit:.2f}, {len(limiter.events)} throttle event(s)")
+            for event in limiter.events:
+                details = ", ".join(f"{k}={v}" for k, v in event.items() if k not in ("time_utc", "kind") and v is not None)
+                print(f"  {event['time_utc']} {event['kind']} ({details})")
+        events = collector.get_all_events()
+        frame_counts = collector.get_frame_counts()
+        if frame_counts:
+            decoder_name = next(n for n, f in FRAME_DECODERS.items() if f is frame_decoder)
+            print(f"Websocket frames ({decoder_name} decoder): " + ", ".join(
+                f"{name} {c['frames']} ({c['skipped']} skipped by prefilter, {c['parsed']} parsed)"
+                for name, c in frame_counts.items()
+            ))
+
+        # Output results, one report per system_id
+        for system_id in system_ids:
+            tag_triggers = [t for t in triggers if t.system_id == system_id]
+            tag_events = [e for e in events if e.node_id == system_id]
+            assigned = assign_events_to_triggers(tag_events, tag_triggers)
+            repeats = None
+            if args.repeat_count > 0:
+                repeats = attribute_repeats(assigned, args.repeat_count, args.repeat_backoff)
+
+            if output_format in ("console", "both"):
+                table = format_trigger_results_table(
+                    triggers=tag_triggers,
+                    assigned=assigned,
+                    system_id=system_id,
+                    trigger_interval=trigger_interval,
+                    connected_systems=connected_systems,
+                    exclude_retried=args.exclude_retried,
+                )
+                print(table)
+                # Capacity steps are summarized per step by the capacity curve instead
+                if not args.capacity_search:
+                    distributions = format_latency_distributions(tag_triggers, assigned, connected_systems)
+                    if distributions:
+                        print(distributions)
+                if args.socket_ab > 0:
+                    print(format_socket_ab_report(tag_triggers, assigned, connected_systems))
+                if repeats is not None:
+                    print(format_repeat_report(
+                        tag_triggers, assigned, repeats, connected_systems, args.repeat_count, args.repeat_backoff
+                    ))
+
+            if output_format in ("csv", "both"):
+                csv_path = write_trigger_results_csv(
+                    triggers=tag_triggers,
+                    assigned=assigned,
+                    system_id=system_id,
+                    endpoint_ips=endpoint_ips,
+                    endpoint_tls=endpoint_tls,
+                    clock=rest_client.clock,
+                    repeats=repeats,
+                    backoff_ms=args.repeat_backoff,
+                )
+                print(f"CSV written to: {csv_path}")
 
         return 0 if events else 1
 
     finally:
+        if record_file is not None:
+            record_file.close()
+        # Close the pooled REST session, once the startup tasks using it are done
+        token_prefetch.cancel()
+        clock_prime.cancel()
+        await asyncio.gather(token_prefetch, clock_prime, return_exceptions=True)
+        await rest_client.close()
+        if zlp_http_session:
+            await zlp_http_session.close()
+        if resolver:
+            await resolver.close()
         # Close all websocket connections
         for name, ws in connections:
             try:
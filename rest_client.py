@@ -8,10 +8,31 @@ Based on the rest_modified.py from ll-lps_cli repo.
 
 import asyncio
 import aiohttp
+import contextvars
+import inspect
 import json
 import time
 import os
+import re
+import random
+import socket
+import ssl
 import logging
+import tempfile
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+from yarl import URL
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 # --------------- Logging setup ---------------
 logging.basicConfig(
@@ -20,20 +41,638 @@ logging.basicConfig(
 )
 
 TOKEN_REFRESH = 20 * 60  # Token refresh interval in seconds
+TOKEN_REFRESH_MARGIN = 60  # Background refresher renews this many seconds before expiry
+TOKEN_RETRY_DELAY = 5  # Seconds between background refresh attempts after a failure
+
+# Connection pool defaults for the shared aiohttp session
+CONNECTOR_LIMIT = 100           # Max simultaneous connections overall
+CONNECTOR_LIMIT_PER_HOST = 10   # Max simultaneous connections per host
+KEEPALIVE_TIMEOUT = 60.0        # Seconds an idle connection is kept in the pool
+
+# Keep-warm defaults (see Rest.start_keep_warm)
+KEEP_WARM_IDLE = 4.0            # Ping once the pool has been idle this long (below typical LB idle timeouts)
+KEEP_WARM_GUARD = 0.5           # Never ping this close before a scheduled request
+
+DNS_PIN_TTL = 300.0             # Seconds a pinned DNS answer is used before re-resolving
+TLS_TICKET_READS = 8            # Reads after a TLS 1.3 handshake to wait for a new session ticket
+
+# TCPConnector(socket_factory=...) only exists from aiohttp 3.12 on
+SOCKET_FACTORY_SUPPORTED = 'socket_factory' in inspect.signature(aiohttp.TCPConnector.__init__).parameters
+
+@dataclass
+class RequestTiming:
+    """
+    Per-request HTTP phase timestamps, filled in from aiohttp trace signals.
+
+    All instants are time.perf_counter() values; None when the phase did not
+    happen (e.g. no DNS lookup or connect on a reused connection). aiohttp
+    reports TCP connect and TLS handshake as one connection-create phase;
+    the TLS fields describe the request's connection and are filled in when the
+    session uses a ResumingTLSContext.
+    """
+    start: Optional[float] = None           # Request handed to aiohttp
+    dns_start: Optional[float] = None
+    dns_end: Optional[float] = None
+    connect_start: Optional[float] = None   # New connection (TCP + TLS) started
+    connect_end: Optional[float] = None
+    connection_reused: bool = False         # Taken from the keep-alive pool
+    headers_sent: Optional[float] = None
+    request_sent: Optional[float] = None    # Last request byte written to the socket
+    first_byte: Optional[float] = None      # Response headers received
+    end: Optional[float] = None             # Response body read
+    status: Optional[int] = None
+    retry_after: Optional[float] = None     # Seconds, from a Retry-After response header
+    peer_ip: Optional[str] = None           # Server address the request actually went to
+    tls_resumed: Optional[bool] = None      # Connection's TLS session was resumed
+    tls_handshake_ms: Optional[float] = None
+
+    @staticmethod
+    def _ms(a, b):
+        if a is None or b is None:
+            return None
+        return (b - a) * 1000
+
+    @property
+    def dns_ms(self):
+        return self._ms(self.dns_start, self.dns_end)
+
+    @property
+    def connect_ms(self):
+        return self._ms(self.connect_start, self.connect_end)
+
+    @property
+    def send_ms(self):
+        """Time from request start until the request was fully written."""
+        return self._ms(self.start, self.request_sent)
+
+    @property
+    def ttfb_ms(self):
+        """Time from request fully written to first response byte (server time + RTT)."""
+        return self._ms(self.request_sent, self.first_byte)
+
+    @property
+    def total_ms(self):
+        return self._ms(self.start, self.end)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Retry / hedging policy applied to Rest.post.
+
+    The default (max_attempts=1, no hedging) sends exactly one request, as before.
+    Hedging sends a second copy of a request that is slower than the given
+    percentile of recent successful requests and keeps whichever answers first;
+    for the locate action that can trigger two locates, so it is opt-in.
+    """
+    max_attempts: int = 1                   # Total attempts including the first (1 = no retries)
+    budget: float = 10.0                    # Max seconds spent across all attempts and backoffs
+    backoff_base: float = 0.2               # Delay before the first retry, doubled for each further retry
+    backoff_max: float = 2.0
+    jitter: float = 0.5                     # Backoff is scaled by a random factor in [1 - jitter, 1 + jitter]
+    retry_statuses: tuple = (429, 500, 502, 503, 504)
+    hedge_percentile: Optional[float] = None  # e.g. 95.0 to hedge requests slower than recent p95
+    hedge_min_samples: int = 20             # Recent samples required before hedging kicks in
+
+    def backoff(self, retry_number):
+        """Delay in seconds before retry number `retry_number` (1-based)."""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (retry_number - 1)))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+@dataclass
+class BulkResult:
+    """Result of one request sent through Rest.post_many."""
+    index: int                              # Position of the request in the input sequence
+    svc: str
+    response: Any = field(default=None, repr=False)
+    error: Optional[BaseException] = None   # Set when every attempt failed at the transport level
+    timing: RequestTiming = field(default_factory=RequestTiming)
+    attempts: list = field(default_factory=list)
+    queued_ms: float = 0.0                  # Time spent waiting for a concurrency slot
+    started: float = 0.0                    # time.perf_counter() when the request got its slot
+    elapsed_ms: float = 0.0                 # From getting the slot until the result (all attempts)
+
+
+@dataclass
+class Attempt:
+    """One HTTP attempt made on behalf of a logical request (retries and hedges included)."""
+    number: int                             # 1-based attempt round
+    hedged: bool = False                    # True for the hedged duplicate of a round
+    timing: RequestTiming = field(default_factory=RequestTiming)
+    outcome: str = ""                       # "ok", "http 503", "error: ClientConnectorError", "cancelled"
+    response: Any = field(default=None, repr=False)
+    error: Optional[BaseException] = field(default=None, repr=False)
+    concurrency_limit: Optional[float] = None  # Adaptive limit when the attempt was sent
+
+    @property
+    def ok(self):
+        return self.outcome == "ok"
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    when = parse_http_date(value)
+    return None if when is None else max(0.0, when - time.time())
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter for requests to one endpoint.
+
+    The limit grows by about one slot per window of fast successful responses and
+    is multiplied by `decrease_factor` on a 429, a 5xx or a latency spike (latency
+    above `spike_factor` x the median of recent successes), at most once per
+    congestion epoch. A Retry-After header pauses all new requests until it expires.
+    Every decrease and pause is recorded in `events`.
+    """
+
+    def __init__(self, initial=4, min_limit=1, max_limit=CONNECTOR_LIMIT_PER_HOST,
+                 decrease_factor=0.5, spike_factor=2.0, window=50, min_samples=10):
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.spike_factor = spike_factor
+        self.min_samples = min_samples
+        self.in_flight = 0
+        self.events = []                    # Throttle events (dicts), in order
+        self._latencies = deque(maxlen=window)
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._cond = asyncio.Condition()
+
+    def _baseline(self):
+        if len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[len(ordered) // 2]
+
+    def _record(self, kind, **details):
+        self.events.append({
+            "time_utc": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "kind": kind,
+            "limit": round(self.limit, 2),
+            **details,
+        })
+
+    async def acquire(self):
+        """Wait for a free slot (and any Retry-After pause); returns the perf_counter start time."""
+        async with self._cond:
+            while True:
+                now = time.perf_counter()
+                if now < self._paused_until:
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), self._paused_until - now)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if self.in_flight < max(1, int(self.limit)):
+                    self.in_flight += 1
+                    return now
+                await self._cond.wait()
+
+    async def release(self, started, latency=None, status=None, retry_after=None):
+        """Release a slot and adapt the limit from the response (latency in seconds)."""
+        async with self._cond:
+            self.in_flight -= 1
+            kind = None
+            baseline = self._baseline()
+            if status == 429:
+                kind = "http 429"
+            elif status is not None and status >= 500:
+                kind = f"http {status}"
+            elif latency is not None and baseline is not None and latency > self.spike_factor * baseline:
+                kind = "latency spike"
+
+            if kind is not None:
+                # Requests already in flight when we backed off don't back off again
+                if started > self._last_decrease:
+                    before = self.limit
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self._last_decrease = time.perf_counter()
+                    self._record(kind, limit_before=round(before, 2),
+                                 latency_ms=None if latency is None else round(latency * 1000, 1))
+                if retry_after:
+                    self._paused_until = max(self._paused_until, time.perf_counter() + retry_after)
+                    self._record("retry-after pause", retry_after_s=retry_after)
+            if latency is not None and (status is None or status < 400):
+                self._latencies.append(latency)
+                if kind is None:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+def parse_http_date(value):
+    """Epoch seconds from an HTTP-date header value (e.g. Date), or None."""
+    if not value:
+        return None
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.timestamp()
+
+
+class ClockSync:
+    """
+    NTP-style estimate of the server clock relative to our time.perf_counter() timebase.
+
+    Each sample brackets one server timestamp by the local instants the request was
+    sent and the response arrived: the server read its clock somewhere in
+    [t_send, t_recv], and a timestamp truncated to `resolution` (1 s for the HTTP Date
+    header) means the true value lies in [server_time, server_time + resolution).
+    That bounds offset = server_epoch - perf_counter to an interval; intersecting the
+    intervals of all samples in the window narrows it well below the header's
+    resolution, since samples land at different sub-second phases. A sample that
+    contradicts the window (stale cached Date, a proxy's clock) is rejected; only
+    `reset_after` contradicting samples in a row (a real clock step) restart the
+    estimate from those samples.
+
+    Rest feeds every response's Date header in when passed as Rest(clock=...).
+    """
+
+    def __init__(self, window=256, max_age=900.0, reset_after=5):
+        self._window = window
+        self._max_age = max_age
+        self._reset_after = reset_after
+        self._samples = deque()     # (t_recv, low, high) offset bounds per sample
+        self._contradicting = []    # Consecutive samples that disagreed with the window
+        self.low = None             # Current offset bounds, seconds
+        self.high = None
+        self.rejected = 0           # Samples dropped for contradicting the window
+        self.resets = 0             # Times a run of contradicting samples restarted the estimate
+
+    def add_sample(self, t_send, t_recv, server_time, resolution=1.0):
+        """Add one bracketed server timestamp (perf_counter instants, server epoch seconds)."""
+        sample = (t_recv, server_time - t_recv, server_time + resolution - t_send)
+        while self._samples and t_recv - self._samples[0][0] > self._max_age:
+            self._samples.popleft()
+        if self._samples:
+            low, high = self._bounds()
+            if max(low, sample[1]) > min(high, sample[2]):
+                self.rejected += 1
+                self._contradicting.append(sample)
+                if len(self._contradicting) < self._reset_after:
+                    return
+                self.resets += 1
+                logging.warning("Server clock samples keep disagreeing (clock step?); restarting the offset estimate")
+                self._samples = deque(self._contradicting)
+                self._contradicting = []
+                low, high = self._bounds()
+                while low > high:
+                    self._samples.popleft()
+                    low, high = self._bounds()
+                self.low, self.high = low, high
+                return
+        self._contradicting = []
+        self._samples.append(sample)
+        if len(self._samples) > self._window:
+            self._samples.popleft()
+        self.low, self.high = self._bounds()
+
+    def _bounds(self):
+        return max(s[1] for s in self._samples), min(s[2] for s in self._samples)
+
+    @property
+    def samples(self):
+        return len(self._samples)
+
+    @property
+    def offset(self):
+        """Best estimate of server_epoch - perf_counter in seconds, or None before any sample."""
+        return None if self.low is None else (self.low + self.high) / 2
+
+    @property
+    def uncertainty(self):
+        """Half-width of the offset bounds in seconds (the error bound of offset)."""
+        return None if self.low is None else (self.high - self.low) / 2
+
+    def to_local(self, server_time):
+        """perf_counter instant of a server epoch timestamp (seconds), or None without samples."""
+        return None if self.low is None else server_time - self.offset
+
+    def wall_offset(self):
+        """Server clock minus local wall clock in seconds, or None without samples."""
+        return None if self.low is None else self.offset - (time.time() - time.perf_counter())
+
+
+# Server address of the connection the current task's request was sent on
+_request_peer = contextvars.ContextVar('_request_peer', default=None)
+_request_tls = contextvars.ContextVar('_request_tls', default=None)
+
+
+@dataclass
+class SocketProfile:
+    """
+    TCP options for latency-sensitive sockets; None/False leaves the OS default.
+
+    Pass connector_kwargs() to aiohttp's TCPConnector so options are set before connect
+    (the receive buffer sizes the advertised window), or apply() on an already connected
+    socket (websockets, and REST connections on aiohttp < 3.12, which has no
+    socket_factory). Linux clears TCP_QUICKACK after every ACK, so rearm() re-sets it;
+    Rest does that before each request.
+    """
+    name: str = "default"
+    nodelay: Optional[bool] = None              # TCP_NODELAY: no Nagle delay on small writes
+    rcvbuf: Optional[int] = None                # SO_RCVBUF in bytes
+    keepalive_idle: Optional[int] = None        # Seconds idle before the first TCP keepalive probe
+    keepalive_interval: Optional[int] = None    # Seconds between probes
+    keepalive_count: Optional[int] = None       # Unanswered probes before the connection is dropped
+    quickack: bool = False                      # TCP_QUICKACK (Linux): ACK immediately
+
+    def apply(self, sock):
+        """Set the profile's options on sock; options the platform lacks are skipped."""
+        if self.nodelay is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, int(self.nodelay))
+        if self.rcvbuf is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+        if self.keepalive_idle is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            for opt, value in (
+                (getattr(socket, 'TCP_KEEPIDLE', None), self.keepalive_idle),
+                (getattr(socket, 'TCP_KEEPINTVL', None), self.keepalive_interval),
+                (getattr(socket, 'TCP_KEEPCNT', None), self.keepalive_count),
+            ):
+                if opt is not None and value is not None:
+                    sock.setsockopt(socket.IPPROTO_TCP, opt, value)
+        self.rearm(sock)
+
+    def rearm(self, sock):
+        if self.quickack and hasattr(socket, 'TCP_QUICKACK'):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+
+    @property
+    def is_default(self):
+        return self == SocketProfile(name=self.name)
+
+    def connector_kwargs(self):
+        """TCPConnector keyword arguments for this profile ({} when there is nothing to set)."""
+        if self.is_default or not SOCKET_FACTORY_SUPPORTED:
+            return {}
+        return {'socket_factory': self.socket_factory}
+
+    def socket_factory(self, addr_info):
+        family, type_, proto, _, _ = addr_info
+        sock = socket.socket(family=family, type=type_, proto=proto)
+        try:
+            self.apply(sock)
+        except OSError as e:
+            logging.debug(f"Socket profile {self.name}: {e}")
+        return sock
+
+
+SOCKET_PROFILES = {
+    "default": SocketProfile(),
+    "low-latency": SocketProfile(
+        name="low-latency",
+        nodelay=True,
+        rcvbuf=256 * 1024,
+        keepalive_idle=10,
+        keepalive_interval=5,
+        keepalive_count=3,
+        quickack=True,
+    ),
+}
+
+
+class _PeerRecordingConnector(aiohttp.TCPConnector):
+    """TCPConnector that notes which server address each request's connection goes to."""
+
+    def __init__(self, *args, socket_profile=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._socket_profile = socket_profile
+
+    async def connect(self, req, traces, timeout):
+        conn = await super().connect(req, traces, timeout)
+        profile = self._socket_profile
+        if profile is not None and not profile.is_default and conn.transport is not None:
+            sock = conn.transport.get_extra_info('socket')
+            if sock is not None:
+                if SOCKET_FACTORY_SUPPORTED:
+                    profile.rearm(sock)
+                else:
+                    # No socket_factory before aiohttp 3.12: set the options once connected
+                    try:
+                        profile.apply(sock)
+                    except OSError as e:
+                        logging.debug(f"Socket profile {profile.name}: {e}")
+        peer = conn.transport.get_extra_info('peername') if conn.transport is not None else None
+        _request_peer.set(peer[0] if peer else None)
+        _request_tls.set(conn.transport.get_extra_info('ssl_object') if conn.transport is not None else None)
+        return conn
+
+
+class _ResumingSSLObject(ssl.SSLObject):
+    """SSLObject that times its handshake and hands new session tickets back to its context."""
+    offered_session = None
+    handshake_start = None
+    handshake_ms = None
+    resumed = None
+    _session_saved = False
+    _session_checks = 0
+
+    def do_handshake(self):
+        if self.handshake_start is None:
+            self.handshake_start = time.perf_counter()
+        super().do_handshake()  # Raises SSLWantReadError until the handshake completes
+        self.handshake_ms = (time.perf_counter() - self.handshake_start) * 1000
+        self.resumed = self.session_reused
+        self.context._handshake_done(self)
+
+    def read(self, len=1024, buffer=None):
+        data = super().read(len, buffer)
+        if not self._session_saved:
+            # TLS 1.3 tickets arrive after the handshake, with the first application data
+            self.context._save_session(self)
+            self._session_checks += 1
+            self._session_saved = self._session_saved or self._session_checks >= TLS_TICKET_READS
+        return data
+
+
+class ResumingTLSContext(ssl.SSLContext):
+    """
+    Client TLS context that resumes sessions across connections to the same host.
+
+    Python doesn't cache client sessions by itself, so every new connection would run a
+    full handshake. This context keeps the latest session ticket per server name and
+    offers it on the next connection. Share one instance between the REST session,
+    websockets.connect(ssl=...) and the ZLP aiohttp session. Each connection's
+    ssl_object (transport.get_extra_info('ssl_object')) carries `resumed` and
+    `handshake_ms`; `stats` counts handshakes and resumptions.
+    """
+    sslobject_class = _ResumingSSLObject
+
+    def __new__(cls, protocol=ssl.PROTOCOL_TLS_CLIENT, *args, **kwargs):
+        return super().__new__(cls, protocol, *args, **kwargs)
+
+    def __init__(self, protocol=ssl.PROTOCOL_TLS_CLIENT):
+        self.load_default_certs(ssl.Purpose.SERVER_AUTH)
+        self.sessions = {}      # server_hostname -> SSLSession
+        self.stats = {"handshakes": 0, "resumed": 0}
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        if session is None and not server_side:
+            session = self.sessions.get(server_hostname)
+        sslobj = super().wrap_bio(incoming, outgoing, server_side, server_hostname, session)
+        sslobj.offered_session = session
+        return sslobj
+
+    def _handshake_done(self, sslobj):
+        self.stats["handshakes"] += 1
+        if sslobj.resumed:
+            self.stats["resumed"] += 1
+        if sslobj.version() != 'TLSv1.3':
+            self._save_session(sslobj)
+
+    def _save_session(self, sslobj):
+        session = sslobj.session
+        if session is None or (sslobj.version() == 'TLSv1.3' and not session.has_ticket):
+            return
+        if session != sslobj.offered_session:
+            self.sessions[sslobj.server_hostname] = session
+            sslobj._session_saved = True
+
+
+class PinnedResolver(aiohttp.abc.AbstractResolver):
+    """
+    DNS resolver that resolves each host once and pins every connection to that address.
+
+    The system resolver doesn't expose record TTLs, so an answer is reused for `ttl`
+    seconds and then re-resolved; a changed address is logged. Every resolution is
+    appended to `history`, and `pinned` maps host -> address currently in use.
+    Pass it to Rest(resolver=...) for REST and use resolve_ip() for websockets.
+    """
+
+    def __init__(self, ttl=DNS_PIN_TTL):
+        self._ttl = ttl
+        self._resolver = aiohttp.ThreadedResolver()
+        self._cache = {}                    # (host, port, family) -> (expires, [ResolveResult])
+        self._lock = asyncio.Lock()
+        self.pinned = {}
+        self.history = []
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        key = (host, port, family)
+        async with self._lock:      # Single-flight: concurrent connects share one lookup
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+
+            t0 = time.perf_counter()
+            addrs = await self._resolver.resolve(host, port, family)
+            pinned = addrs[:1]
+            ip = pinned[0]['host']
+            previous = self.pinned.get(host)
+            if previous is not None and previous != ip:
+                logging.warning(f"DNS for {host} changed: {previous} -> {ip}")
+            self.pinned[host] = ip
+            self.history.append({
+                "host": host,
+                "ip": ip,
+                "candidates": [a['host'] for a in addrs],
+                "resolve_ms": round((time.perf_counter() - t0) * 1000, 1),
+                "time_utc": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            })
+            self._cache[key] = (time.monotonic() + self._ttl, pinned)
+            return pinned
+
+    async def resolve_ip(self, host, port=0):
+        """Pinned address for host as a string (e.g. to pass as host= to websockets.connect)."""
+        return (await self.resolve(host, port, socket.AF_UNSPEC))[0]['host']
+
+    async def close(self):
+        await self._resolver.close()
+
+
+class PreparedRequest:
+    """A request whose URL, body bytes and headers are built once and reused (see Rest.prepare_post)."""
+    __slots__ = ('svc', 'url', 'body', '_authorization', '_headers')
+
+    def __init__(self, svc, url, body):
+        self.svc = svc
+        self.url = url
+        self.body = body
+        self._authorization = None
+        self._headers = {'Content-Type': 'application/json'}
+
+    def headers(self, authorization):
+        """Headers for a send; rebuilt only when the Authorization value changes."""
+        if authorization != self._authorization:
+            headers = {'Content-Type': 'application/json'}
+            if authorization:
+                headers['Authorization'] = authorization
+            self._headers = headers
+            self._authorization = authorization
+        return self._headers
+
+
+def default_token_file(url, username):
+    """Token cache file name keyed by API host and user, e.g. token_api.wifi-dev.zainar.net_alice.txt."""
+    host = urlparse(url).hostname or 'default'
+    key = re.sub(r'[^A-Za-z0-9._-]', '_', f"{host}_{username}")
+    return f"token_{key}.txt"
+
+
+def _lock_file(path):
+    """Open path and take an exclusive advisory lock on it, blocking until acquired."""
+    f = open(path, 'a+')
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError:
+                continue  # LK_LOCK gives up after ~10s; keep waiting
+    return f
+
+
+def _unlock_file(f):
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        f.close()
+
 
 class Config:
     """Configuration class for REST API settings."""
-    def __init__(self, url, username, password, token_file='token.txt'):
+    def __init__(self, url, username, password, token_file=None):
         self.REST_API = url
         self.REST_USER = username
         self.REST_PASSWORD = password
         current_dir = os.path.dirname(os.path.abspath(__file__))
+        # Default cache is per environment (API host) and user, so parallel runs don't clash
+        if token_file is None:
+            token_file = default_token_file(url, username)
         self.REST_TOKEN_FILE = os.path.join(current_dir, token_file)
         self.REST_AUTH = None
         self.SERVICE_KEY = None
 
 class Rest:
-    """REST API client for interacting with external services."""
+    """
+    REST API client for interacting with external services.
+
+    Owns a single pooled aiohttp session so repeated calls reuse kept-alive
+    connections. Use as an async context manager, or call close() when done:
+
+        async with Rest(config) as rest_client:
+            await rest_client.post(...)
+    """
     
     class ClientError(Exception):
         def __init__(self, status, reason, content):
@@ -42,129 +681,623 @@ class Rest:
             self.reason = reason
             self.content = content
 
-    def __init__(self, config):
-        self.config = Config(config.REST_API, config.REST_USER, config.REST_PASSWORD, getattr(config, "REST_TOKEN_FILE", "token.txt"))
+    def __init__(
+        self,
+        config,
+        limit=CONNECTOR_LIMIT,
+        limit_per_host=CONNECTOR_LIMIT_PER_HOST,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        retry_policy=None,
+        limiter=None,
+        resolver=None,
+        ssl_context=None,
+        socket_profile=None,
+        clock=None,
+    ):
+        self.config = Config(config.REST_API, config.REST_USER, config.REST_PASSWORD, getattr(config, "REST_TOKEN_FILE", None))
         self._token = None
-        self._evToken = None
         self._tokenTime = 0
+        self._token_refresh = None      # In-flight refresh shared by all waiters
+        self._token_refresher = None    # Background refresh task
+
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._resolver = resolver                   # e.g. PinnedResolver; None uses aiohttp's default
+        self.ssl_context = ssl_context              # e.g. ResumingTLSContext; None uses aiohttp's default
+        self.socket_profile = socket_profile or SOCKET_PROFILES["default"]
+        self.clock = clock                          # Optional ClockSync fed from response Date headers
+        self._session = None
+        self.stats = {
+            "requests": 0, "connections_created": 0, "connections_reused": 0, "keep_warm_pings": 0, "clock_pings": 0,
+        }
+
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.limiter = limiter                      # Optional AdaptiveLimiter gating every attempt
+        self._recent_latencies = deque(maxlen=200)  # Seconds, successful attempts (for hedging)
+
+        self._last_activity = time.perf_counter()
+        self._next_request_at = None
+        self._keep_warm_task = None
+
+    # ------------------------------------ SESSION LIFECYCLE ------------------------------------ #
+
+    async def __aenter__(self):
+        self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self):
+        """Return the shared session, creating it on first use (must run inside the event loop)."""
+        if self._session is None or self._session.closed:
+            connector_kwargs = self.socket_profile.connector_kwargs()
+            if self.ssl_context is not None:
+                connector_kwargs['ssl'] = self.ssl_context
+            connector = _PeerRecordingConnector(
+                limit=self._limit,
+                limit_per_host=self._limit_per_host,
+                keepalive_timeout=self._keepalive_timeout,
+                resolver=self._resolver,
+                socket_profile=self.socket_profile,
+                **connector_kwargs,
+            )
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_request_start.append(self._on_request_start)
+            trace_config.on_dns_resolvehost_start.append(self._on_dns_resolvehost_start)
+            trace_config.on_dns_resolvehost_end.append(self._on_dns_resolvehost_end)
+            trace_config.on_connection_create_start.append(self._on_connection_create_start)
+            trace_config.on_connection_create_end.append(self._on_connection_create_end)
+            trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+            trace_config.on_request_headers_sent.append(self._on_request_headers_sent)
+            trace_config.on_request_chunk_sent.append(self._on_request_chunk_sent)
+            trace_config.on_request_end.append(self._on_request_end)
+            self._session = aiohttp.ClientSession(connector=connector, trace_configs=[trace_config])
+        return self._session
+
+    async def set_socket_profile(self, profile):
+        """
+        Use a different SocketProfile for subsequent requests.
+
+        Pooled connections carry the old options, so they are closed; call warm_up()
+        afterwards to open a connection with the new profile before the next request.
+        """
+        self.socket_profile = profile
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def close(self):
+        """Close the shared session and its pooled connections."""
+        await self.stop_keep_warm()
+        await self.stop_token_refresher()
+        # A refresh still in flight (shielded from its waiters) must not outlive the session
+        if self._token_refresh is not None and not self._token_refresh.done():
+            self._token_refresh.cancel()
+            try:
+                await self._token_refresh
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._token_refresh = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    # ------------------------------------ KEEP-WARM ------------------------------------ #
+
+    async def _ping(self, svc='', stat="keep_warm_pings"):
+        """Send a cheap unauthenticated HEAD to keep (or open) a pooled connection."""
+        base_url = self.config.REST_API.rstrip('/')
+        url = f"{base_url}/{svc.lstrip('/')}"
+        session = self._get_session()
+        self.stats[stat] += 1
+        try:
+            async with session.head(url) as response:
+                await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.warning(f"Keep-warm ping failed for {url}: {type(e).__name__} {e}")
+        finally:
+            self._last_activity = time.perf_counter()
+
+    async def warm_up(self, connections=1, svc=''):
+        """Open `connections` pooled connections up front so the first requests reuse them."""
+        await asyncio.gather(*(self._ping(svc) for _ in range(connections)))
+
+    async def sample_clock(self, count=10, spacing=0.113):
+        """
+        Send `count` HEAD pings `spacing` seconds apart to seed the ClockSync.
+
+        The spacing is deliberately not a divisor of one second, so the Date headers
+        (1 s resolution) are read at different sub-second phases and the offset bounds
+        narrow quickly. Does nothing without a clock.
+        """
+        if self.clock is None:
+            return
+        for i in range(count):
+            if i:
+                await asyncio.sleep(spacing)
+            await self._ping(stat="clock_pings")
+
+    def set_next_request_time(self, perf_time):
+        """Tell keep-warm when the next scheduled request will be sent (time.perf_counter() value)."""
+        self._next_request_at = perf_time
+
+    def start_keep_warm(self, idle=KEEP_WARM_IDLE, guard=KEEP_WARM_GUARD, svc=''):
+        """
+        Keep pooled connections alive between sparse requests.
+
+        Pings whenever the pool has been idle for `idle` seconds, but never within
+        `guard` seconds of the time given to set_next_request_time(), so a ping is
+        not holding the connection when a scheduled request needs it.
+        """
+        if self._keep_warm_task is None or self._keep_warm_task.done():
+            self._keep_warm_task = asyncio.create_task(self._keep_warm_loop(idle, guard, svc))
+
+    async def stop_keep_warm(self):
+        if self._keep_warm_task is not None:
+            self._keep_warm_task.cancel()
+            try:
+                await self._keep_warm_task
+            except asyncio.CancelledError:
+                pass
+            self._keep_warm_task = None
+
+    async def _keep_warm_loop(self, idle, guard, svc):
+        while True:
+            now = time.perf_counter()
+            due = self._last_activity + idle
+            if due > now:
+                await asyncio.sleep(due - now)
+                continue
+            next_at = self._next_request_at
+            if next_at is not None and 0 <= next_at - now < guard:
+                # Too close to a scheduled request; let it refresh the connection instead
+                await asyncio.sleep(next_at - now + guard)
+                continue
+            await self._ping(svc)
+
+    # Trace callbacks: trace_request_ctx is the RequestTiming passed to _request (or None)
+
+    async def _on_request_start(self, session, trace_config_ctx, params):
+        timing = trace_config_ctx.trace_request_ctx
+        if isinstance(timing, RequestTiming):
+            timing.start = time.perf_counter()
+
+    async def _on_dns_resolvehost_start(self, session, trace_config_ctx, params):
+        timing = trace_config_ctx.trace_request_ctx
+        if isinstance(timing, RequestTiming):
+            timing.dns_start = time.perf_counter()
+
+    async def _on_dns_resolvehost_end(self, session, trace_config_ctx, params):
+        timing = trace_config_ctx.trace_request_ctx
+        if isinstance(timing, RequestTiming):
+            timing.dns_end = time.perf_counter()
+
+    async def _on_connection_create_start(self, session, trace_config_ctx, params):
+        timing = trace_config_ctx.trace_request_ctx
+        if isinstance(timing, RequestTiming):
+            timing.connect_start = time.perf_counter()
+
+    async def _on_connection_create_end(self, session, trace_config_ctx, params):
+        self.stats["connections_created"] += 1
+        timing = trace_config_ctx.trace_request_ctx
+        if isinstance(timing, RequestTiming):
+            timing.connect_end = time.perf_counter()
+
+    async def _on_connection_reuseconn(self, session, trace_config_ctx, params):
+        self.stats["connections_reused"] += 1
+        timing = trace_config_ctx.trace_request_ctx
+        if isinstance(timing, RequestTiming):
+            timing.connection_reused = True
+
+    async def _on_request_headers_sent(self, session, trace_config_ctx, params):
+        trace_config_ctx.clock_sent = time.perf_counter()
+        timing = trace_config_ctx.trace_request_ctx
+        if isinstance(timing, RequestTiming):
+            timing.headers_sent = time.perf_counter()
+            timing.request_sent = timing.headers_sent
+
+    async def _on_request_chunk_sent(self, session, trace_config_ctx, params):
+        timing = trace_config_ctx.trace_request_ctx
+        if isinstance(timing, RequestTiming):
+            timing.request_sent = time.perf_counter()
+
+    async def _on_request_end(self, session, trace_config_ctx, params):
+        t_end = time.perf_counter()
+        if self.clock is not None and hasattr(trace_config_ctx, 'clock_sent'):
+            server_time = parse_http_date(params.response.headers.get('Date'))
+            if server_time is not None:
+                self.clock.add_sample(trace_config_ctx.clock_sent, t_end, server_time)
+        timing = trace_config_ctx.trace_request_ctx
+        if isinstance(timing, RequestTiming):
+            timing.first_byte = t_end
+            timing.status = params.response.status
+            timing.retry_after = parse_retry_after(params.response.headers.get('Retry-After'))
+            timing.peer_ip = _request_peer.get()
+            sslobj = _request_tls.get()
+            if isinstance(sslobj, _ResumingSSLObject):
+                timing.tls_resumed = sslobj.resumed
+                timing.tls_handshake_ms = sslobj.handshake_ms
 
     # ------------------------------------ TOKEN MANAGEMENT ------------------------------------ #
 
     async def get_token(self):
-        """Retrieve or refresh the API token."""
+        """
+        Return the API token, refreshing it only if it is missing or expired.
+
+        Concurrent callers share one in-flight refresh (single-flight). With the
+        background refresher running, a valid token is always returned immediately.
+        """
         if not self.config.REST_TOKEN_FILE:
             return self._token
 
-        if time.time() - self._tokenTime >= TOKEN_REFRESH:
-            self._evToken = None
-
-        if self._evToken is not None:
-            await self._evToken.wait()
-        else:
-            self._evToken = asyncio.Event()
-            self._tokenTime = time.time()
-            await self._refresh_token()
-            self._evToken.set()
+        if self._token and time.time() - self._tokenTime < TOKEN_REFRESH:
+            return self._token
 
+        await self._refresh_single_flight(TOKEN_REFRESH)
         return self._token
 
-    async def _refresh_token(self):
-        """Refresh the API token by authenticating with the server."""
-        token = None
+    async def prefetch_token(self):
+        """Fetch the token ahead of the first request (e.g. while websockets connect)."""
+        return await self.get_token()
 
-        # Check for valid token in file
-        if self.config.REST_TOKEN_FILE:
+    async def _refresh_single_flight(self, max_age):
+        if self._token_refresh is None or self._token_refresh.done():
+            self._token_refresh = asyncio.ensure_future(self._refresh_token(max_age))
+        # Shield so one cancelled waiter doesn't cancel the refresh for everyone else
+        await asyncio.shield(self._token_refresh)
+
+    def start_token_refresher(self, margin=TOKEN_REFRESH_MARGIN):
+        """Renew the token in the background `margin` seconds before it expires."""
+        if self.config.REST_AUTH or self.config.SERVICE_KEY or not self.config.REST_TOKEN_FILE:
+            return
+        if self._token_refresher is None or self._token_refresher.done():
+            self._token_refresher = asyncio.create_task(self._token_refresh_loop(margin))
+
+    async def stop_token_refresher(self):
+        if self._token_refresher is not None:
+            self._token_refresher.cancel()
+            try:
+                await self._token_refresher
+            except asyncio.CancelledError:
+                pass
+            self._token_refresher = None
+
+    async def _token_refresh_loop(self, margin):
+        max_age = TOKEN_REFRESH - margin
+        while True:
+            delay = self._tokenTime + max_age - time.time()
+            if self._token and delay > 0:
+                await asyncio.sleep(delay)
+                continue
             try:
-                st = os.stat(self.config.REST_TOKEN_FILE)
-                if time.time() - st.st_mtime < TOKEN_REFRESH:
-                    with open(self.config.REST_TOKEN_FILE, 'r') as f:
-                        token = f.read()
-                    self._tokenTime = st.st_mtime
+                await self._refresh_single_flight(max_age)
             except Exception as e:
-                logging.warning(f"Error reading token file: {e}")
+                logging.warning(f"Background token refresh failed: {e}")
+                await asyncio.sleep(TOKEN_RETRY_DELAY)
+                continue
+            # A refresh that left no usable token must not turn into a tight re-auth loop
+            if not self._token or self._tokenTime + max_age <= time.time():
+                await asyncio.sleep(TOKEN_RETRY_DELAY)
+
+    def _read_token_file(self, max_age):
+        """Return (token, mtime) from the token file if younger than max_age, else (None, None)."""
+        try:
+            st = os.stat(self.config.REST_TOKEN_FILE)
+            if time.time() - st.st_mtime < max_age:
+                with open(self.config.REST_TOKEN_FILE, 'r') as f:
+                    token = f.read()
+                if token:
+                    return token, st.st_mtime
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"Error reading token file: {e}")
+        return None, None
+
+    def _write_token_file(self, token):
+        """Atomically replace the token file so readers never see a partial token."""
+        path = self.config.REST_TOKEN_FILE
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.token-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(token)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    async def _refresh_token(self, max_age=TOKEN_REFRESH):
+        """
+        Refresh the API token from the token file, or by authenticating with the server.
+
+        Authentication happens under an advisory lock on "<token file>.lock", so when
+        several processes share a token file only the first one authenticates; the
+        others wait for the lock and then pick up the freshly written token.
+
+        Raises Rest.ClientError when authentication fails (non-2xx or no token in the
+        response), leaving the previous token in place.
+        """
+        token = None
+
+        # Check for valid token in file (file I/O runs off the event loop)
+        if self.config.REST_TOKEN_FILE:
+            token, mtime = await asyncio.to_thread(self._read_token_file, max_age)
+            if token:
+                self._tokenTime = mtime
 
         # Authenticate and fetch a new token if necessary
         if not token:
-            logging.info("Authenticating to fetch a new token...")
-            data = await self._request(
-                method='POST',
-                svc='authenticate',
-                body={'username': self.config.REST_USER, 'password': self.config.REST_PASSWORD},
-                no_auth=True
-            )
-            token = data.get('token', '') if isinstance(data, dict) else ''
-            self._tokenTime = time.time()
+            lock = None
+            if self.config.REST_TOKEN_FILE:
+                lock = await asyncio.to_thread(_lock_file, self.config.REST_TOKEN_FILE + '.lock')
+            try:
+                # Another process may have refreshed the token while we waited for the lock
+                if lock is not None:
+                    token, mtime = await asyncio.to_thread(self._read_token_file, max_age)
+                    if token:
+                        self._tokenTime = mtime
+
+                if not token:
+                    logging.info("Authenticating to fetch a new token...")
+                    timing = RequestTiming()
+                    data = await self._request(
+                        method='POST',
+                        svc='authenticate',
+                        body={'username': self.config.REST_USER, 'password': self.config.REST_PASSWORD},
+                        no_auth=True,
+                        timing=timing
+                    )
+                    token = data.get('token', '') if isinstance(data, dict) else ''
+                    if timing.status is not None and not 200 <= timing.status < 300:
+                        raise self.ClientError(timing.status, 'authentication failed', data)
+                    if not token:
+                        raise self.ClientError(timing.status, 'no token in authentication response', data)
+                    self._tokenTime = time.time()
 
-            # Save the new token to the token file
-            if token and self.config.REST_TOKEN_FILE:
-                with open(self.config.REST_TOKEN_FILE, 'w') as f:
-                    f.write(token)
+                    # Save the new token to the token file
+                    if self.config.REST_TOKEN_FILE:
+                        await asyncio.to_thread(self._write_token_file, token)
+            finally:
+                if lock is not None:
+                    await asyncio.to_thread(_unlock_file, lock)
 
         self._token = token
 
     # ------------------------------------ REQUEST HANDLING ------------------------------------ #
 
-    async def _authorize(self, headers):
+    async def _authorization(self):
+        """Value for the Authorization header, or None."""
         if self.config.REST_AUTH:
-            headers.update({'Authorization': self.config.REST_AUTH})
-        elif self.config.SERVICE_KEY:
-            headers.update({'Authorization': self.config.SERVICE_KEY})
-        else:
-            token = await self.get_token()
-            if token:
-                headers.update({'Authorization': f'Bearer {token}'})
+            return self.config.REST_AUTH
+        if self.config.SERVICE_KEY:
+            return self.config.SERVICE_KEY
+        token = await self.get_token()
+        return f'Bearer {token}' if token else None
+
+    async def _authorize(self, headers):
+        authorization = await self._authorization()
+        if authorization:
+            headers.update({'Authorization': authorization})
 
-    async def _request(self, method, svc, body=None, verbose=0, no_auth=False):
+    def _url(self, svc):
         # Ensure proper URL construction without double slashes
         base_url = self.config.REST_API.rstrip('/')
-        url = f"{base_url}/{svc.lstrip('/')}"
-        headers = {}
-
-        if body is not None:
-            headers.update({'Content-Type': 'application/json'})
-        if not no_auth:
-            await self._authorize(headers)
-
-        if verbose > 0:
-            logging.info(f"{method}: {url}")
-        if verbose > 2:
-            logging.debug(json.dumps(headers, indent=2))
-        if body and verbose > 1:
-            logging.debug(json.dumps(body, indent=2))
-        
-        async def on_response(response):
-            status = response.status
-            content_type = response.content_type
-            url_str = str(response.url)
-            try:
-                if content_type == 'application/json':
-                    data = await response.json()
-                    return data
-                else:
-                    text = await response.text()
-                    return text
-            except Exception as e:
-                text = await response.text()
-                return text
+        return f"{base_url}/{svc.lstrip('/')}"
 
-        async with aiohttp.ClientSession() as session:
-            try:
-                if method == 'POST':
-                    return await on_response(await session.post(url, headers=headers, json=body))
-                if method == 'PUT':
-                    return await on_response(await session.put(url, headers=headers, json=body))
-                if method == 'GET':
-                    return await on_response(await session.get(url, headers=headers, json=body))
-                if method == 'DELETE':
-                    return await on_response(await session.delete(url, headers=headers))
-            except aiohttp.ClientError as e:
-                logging.error(f"HTTP request failed for {url}: {e}")
-                raise
+    def prepare_post(self, svc, body):
+        """
+        Encode a POST once for repeated sending: the URL is parsed and the JSON body
+        serialized up front. Pass the result as the body to post() / post_many(); only
+        the Authorization header is (re)attached per send, and only when the token changed.
+        """
+        return PreparedRequest(svc, URL(self._url(svc)), json.dumps(body, separators=(',', ':')).encode('utf-8'))
+
+    @staticmethod
+    async def _read_response(response):
+        try:
+            if response.content_type == 'application/json':
+                return await response.json()
+            return await response.text()
+        except Exception:
+            return await response.text()
+
+    async def _request(self, method, svc, body=None, verbose=0, no_auth=False, timing=None):
+        if method not in ('POST', 'PUT', 'GET', 'DELETE'):
+            return None
+
+        if isinstance(body, PreparedRequest):
+            # Fast path: URL, body bytes and headers were built once in prepare_post()
+            url = body.url
+            headers = body.headers(None if no_auth else await self._authorization())
+            json_body, data = None, body.body
+        else:
+            url = self._url(svc)
+            headers = {}
+
+            if body is not None:
+                headers.update({'Content-Type': 'application/json'})
+            if not no_auth:
+                await self._authorize(headers)
+
+            if verbose > 0:
+                logging.info(f"{method}: {url}")
+            if verbose > 2:
+                logging.debug(json.dumps(headers, indent=2))
+            if body and verbose > 1:
+                logging.debug(json.dumps(body, indent=2))
+            json_body, data = (None if method == 'DELETE' else body), None
+
+        session = self._get_session()
+        self.stats["requests"] += 1
+        try:
+            async with session.request(
+                method, url, headers=headers, json=json_body, data=data, trace_request_ctx=timing
+            ) as response:
+                data = await self._read_response(response)
+                if timing is not None:
+                    timing.end = time.perf_counter()
+                return data
+        except aiohttp.ClientError as e:
+            logging.error(f"HTTP request failed for {url}: {e}")
+            raise
+        finally:
+            self._last_activity = time.perf_counter()
+
+    # ------------------------------------ RETRIES AND HEDGING ------------------------------------ #
+
+    def _hedge_delay(self, policy):
+        """Seconds after which to hedge, or None if hedging is off or there is too little history."""
+        if policy.hedge_percentile is None or len(self._recent_latencies) < policy.hedge_min_samples:
+            return None
+        ordered = sorted(self._recent_latencies)
+        idx = min(len(ordered) - 1, int(len(ordered) * policy.hedge_percentile / 100))
+        return ordered[idx]
+
+    async def _attempt(self, attempt, method, svc, body, verbose, policy):
+        if self.limiter is None:
+            return await self._attempt_unlimited(attempt, method, svc, body, verbose, policy)
+        started = await self.limiter.acquire()
+        attempt.concurrency_limit = self.limiter.limit
+        try:
+            return await self._attempt_unlimited(attempt, method, svc, body, verbose, policy)
+        finally:
+            timing = attempt.timing
+            latency = None
+            if attempt.outcome != "cancelled" and timing.start is not None and timing.first_byte is not None:
+                latency = timing.first_byte - timing.start
+            await self.limiter.release(started, latency, timing.status, timing.retry_after)
+
+    async def _attempt_unlimited(self, attempt, method, svc, body, verbose, policy):
+        try:
+            attempt.response = await self._request(method, svc, body, verbose=verbose, timing=attempt.timing)
+            status = attempt.timing.status
+            if status is not None and (status in policy.retry_statuses or status >= 500):
+                attempt.outcome = f"http {status}"
+            else:
+                attempt.outcome = "ok"
+                if attempt.timing.start is not None and attempt.timing.end is not None:
+                    self._recent_latencies.append(attempt.timing.end - attempt.timing.start)
+        except asyncio.CancelledError:
+            attempt.outcome = "cancelled"
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            attempt.outcome = f"error: {type(e).__name__}"
+            attempt.error = e
+        return attempt
+
+    async def _attempt_round(self, number, method, svc, body, verbose, policy, attempts):
+        """Run one attempt, hedging it if it is slower than the policy's latency percentile."""
+        primary = Attempt(number=number)
+        attempts.append(primary)
+        tasks = {asyncio.create_task(self._attempt(primary, method, svc, body, verbose, policy))}
+        try:
+            hedge_delay = self._hedge_delay(policy)
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            if done:
+                # result() re-raises what the attempt didn't record (e.g. a failed token refresh)
+                return done.pop().result()
+
+            hedge = Attempt(number=number, hedged=True)
+            attempts.append(hedge)
+            tasks.add(asyncio.create_task(self._attempt(hedge, method, svc, body, verbose, policy)))
+            last = primary
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    last = task.result()
+                    if last.ok:
+                        return last
+            return last
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _request_with_policy(self, method, svc, body, verbose=0, timing=None, attempts=None, policy=None):
+        """
+        Send a request under a RetryPolicy.
+
+        Every attempt is appended to `attempts` (if given). `timing` is filled from the
+        attempt whose response is returned. Raises the last client error when all attempts
+        failed at the transport level; returns the last response for exhausted HTTP errors.
+        """
+        policy = policy or self.retry_policy
+        attempts = attempts if attempts is not None else []
+        t_start = time.perf_counter()
+        number = 0
+        while True:
+            number += 1
+            attempt = await self._attempt_round(number, method, svc, body, verbose, policy, attempts)
+            if not attempt.ok:
+                delay = policy.backoff(number)
+                # Honor the server's Retry-After when it asks for longer than our backoff
+                if attempt.timing.retry_after is not None:
+                    delay = max(delay, attempt.timing.retry_after)
+                exhausted = number >= policy.max_attempts
+                over_budget = time.perf_counter() - t_start + delay > policy.budget
+                if not exhausted and not over_budget:
+                    logging.warning(f"{method} {svc} attempt {number} failed ({attempt.outcome}), retrying in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                    continue
+            if timing is not None:
+                timing.__dict__.update(vars(attempt.timing))
+            if attempt.error is not None:
+                raise attempt.error
+            return attempt.response
 
     # ------------------------------------ PUBLIC API METHODS ------------------------------------ #
 
-    async def post(self, svc, body, verbose=0):
-        return await self._request('POST', svc, body, verbose=verbose)
+    async def post(self, svc, body, verbose=0, timing=None, attempts=None):
+        """
+        POST to svc under the client's retry policy.
+
+        Pass a RequestTiming as timing to capture per-phase HTTP timestamps of the
+        answering attempt, and a list as attempts to collect every Attempt made.
+        """
+        return await self._request_with_policy('POST', svc, body, verbose=verbose, timing=timing, attempts=attempts)
+
+    async def post_many(self, requests, concurrency=CONNECTOR_LIMIT_PER_HOST, verbose=0):
+        """
+        POST many (svc, body) requests over the shared session, at most `concurrency` in flight.
+
+        Async generator yielding a BulkResult per request as soon as it completes (not in
+        input order). Each request runs under the retry policy like post(). Keep concurrency
+        at or below the connector's limit_per_host, or requests queue for a connection.
+        Closing the generator early cancels the requests still in flight.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_one(index, svc, body):
+            result = BulkResult(index=index, svc=svc)
+            t_queued = time.perf_counter()
+            async with semaphore:
+                result.started = time.perf_counter()
+                result.queued_ms = (result.started - t_queued) * 1000
+                try:
+                    result.response = await self.post(
+                        svc, body, verbose=verbose, timing=result.timing, attempts=result.attempts
+                    )
+                except (aiohttp.ClientError, asyncio.TimeoutError, Rest.ClientError) as e:
+                    result.error = e
+                result.elapsed_ms = (time.perf_counter() - result.started) * 1000
+            return result
+
+        tasks = [asyncio.create_task(run_one(i, svc, body)) for i, (svc, body) in enumerate(requests)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
     async def put(self, svc, body, verbose=0):
         return await self._request('PUT', svc, body, verbose=verbose)
@@ -3,11 +3,12 @@
 Minimal locate trigger by system ID.
 
 Usage:
-  python3 trigger_locate_simple.py <env> <system_id> <node_type> [repeat_count] [interval_ms]
+  python3 trigger_locate_simple.py <env> <system_id>[,<system_id>...] <node_type> [repeat_count] [interval_ms] [--concurrency N]
 
 Examples:
   python3 trigger_locate_simple.py dev 0b409f9eeb834f9e8346ee4b9abe9cbb tag
   python3 trigger_locate_simple.py dev 0b409f9eeb834f9e8346ee4b9abe9cbb reader 3 2000
+  python3 trigger_locate_simple.py dev 0b409f9eeb834f9e8346ee4b9abe9cbb,d1638e05370c49a0bd5f5d9088e53b78 tag --concurrency 20
 """
 
 import argparse
@@ -58,19 +59,45 @@ def build_parser() -> argparse.ArgumentParser:
         epilog=f"Environments from env_config.json: {envs}",
     )
     parser.add_argument("env", help="Environment name from env_config.json")
-    parser.add_argument("system_id", help="System ID of the node")
+    parser.add_argument("system_id", help="System ID of the node; comma-separate several IDs to trigger them concurrently")
     parser.add_argument("node_type", help="tag/tracker or reader/anchor")
     parser.add_argument("repeat_count", nargs="?", type=int, default=0)
     parser.add_argument("interval_ms", nargs="?", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=10, help="Max POSTs in flight with several system IDs (default: 10)")
     return parser
 
 
+async def trigger_many(rest_client: Rest, system_ids: list, payload: dict, concurrency: int) -> int:
+    """POST the locate to every system ID concurrently, printing each result as it completes."""
+    print(f"POST nodes/<system_id>/action for {len(system_ids)} nodes (concurrency={concurrency})")
+    failures = 0
+    async with rest_client:
+        t_start = time.perf_counter()
+        requests = [(f"nodes/{system_id}/action", payload) for system_id in system_ids]
+        async for result in rest_client.post_many(requests, concurrency=concurrency):
+            system_id = system_ids[result.index]
+            if result.error is not None or (result.timing.status or 0) >= 400:
+                failures += 1
+                reason = result.error if result.error is not None else f"HTTP {result.timing.status}"
+                print(f"  {system_id}: FAILED ({reason})")
+                continue
+            action_id = result.response.get("action_id", "") if isinstance(result.response, dict) else ""
+            print(f"  {system_id}: {result.elapsed_ms:.1f} ms (queued {result.queued_ms:.1f} ms, action_id: {action_id})")
+        wall_ms = (time.perf_counter() - t_start) * 1000
+
+    print(f"Triggered {len(system_ids) - failures}/{len(system_ids)} nodes in {wall_ms:.1f} ms")
+    return 1 if failures else 0
+
+
 async def main() -> int:
     parser = build_parser()
     args = parser.parse_args()
 
     env = args.env
-    system_id = args.system_id
+    # Comma-separated IDs, duplicates dropped (a tag triggered twice per round would skew its latency)
+    system_ids = list(dict.fromkeys(s.strip() for s in args.system_id.split(",") if s.strip()))
+    if not system_ids:
+        parser.error("system_id must name at least one node")
     node_type = args.node_type
     repeat_count = args.repeat_count
     interval_ms = args.interval_ms
@@ -98,12 +125,20 @@ async def main() -> int:
         },
     }
 
-    api_endpoint = f"nodes/{system_id}/action"
+    if len(system_ids) > 1:
+        return await trigger_many(rest_client, system_ids, payload, args.concurrency)
+
+    api_endpoint = f"nodes/{system_ids[0]}/action"
     print(f"POST {api_endpoint}")
     
-    t_start = time.perf_counter()
-    response = await rest_client.post(api_endpoint, payload, verbose=1)
-    t_end = time.perf_counter()
+    async with rest_client:
+        t_start = time.perf_counter()
+        try:
+            response = await rest_client.post(api_endpoint, payload, verbose=1)
+        except Rest.ClientError as e:
+            print(f"FAILED ({e})")
+            return 1
+        t_end = time.perf_counter()
 
     round_trip_ms = (t_end - t_start) * 1000
     print(f"API round-trip: {round_trip_ms:.1f} ms")